@@ -11,13 +11,29 @@ bl_info = {
 
 
 import bpy
-from bpy.props import StringProperty, BoolProperty, PointerProperty, FloatProperty, CollectionProperty, IntProperty
+from bpy.props import StringProperty, BoolProperty, PointerProperty, FloatProperty, CollectionProperty, IntProperty, EnumProperty
 import os
+import re
+import ast
+import fnmatch
+import functools
+import inspect
+import collections
+import csv
 import time
 import subprocess
 import hashlib
-import sys
+import uuid
+import hmac
+import secrets
+import concurrent.futures
 from .i18n import _, load_language, _f
+from .stats import RingBuffer, summarize, histogram, sparkline
+from .profiling import ProfileCapture, LineProfileCapture, TraceRecorder
+from . import bulk
+from .watcher import FileStatCache, InotifyWatcher
+from .server import PushServer
+from .jobs import MainThreadQueue, ProcessPool, ThreadPool, ThreadJobs, AsyncLoop
 
 
 def DebugPrint(*args):
@@ -25,13 +41,102 @@ def DebugPrint(*args):
         print(*args)
 
 
+# NOTE 外部编辑器推送代码的本机服务, 由定时器轮询, 文件加载后继续运行
+_push_server = PushServer()
+PUSH_SERVER_INTERVAL = 0.01
+
+
+def handle_push_message(message):
+    """处理外部编辑器发来的一条消息, 返回回复"""
+    addon_prefs = bpy.context.preferences.addons[__name__].preferences
+    token = message.get("token")
+    # 任何本机程序(包括浏览器中的网页)都能连接到端口, 必须校验令牌
+    if not addon_prefs.push_server_token or not isinstance(token, str) or not hmac.compare_digest(token, addon_prefs.push_server_token):
+        return {"ok": False, "message": "Invalid token"}
+    command = message.get("command")
+    if command == "ping":
+        return {"ok": True, "message": "pong"}
+    if command not in ("replace", "run"):
+        return {"ok": False, "message": f"Unknown command: {command}"}
+    name = message.get("text", "")
+    text = bpy.data.texts.get(name)
+    if command == "replace":
+        if text is None:
+            if not message.get("create"):
+                return {"ok": False, "message": f"Text '{name}' not found"}
+            text = bpy.data.texts.new(name)
+        text.clear()
+        text.write(message.get("content", ""))
+        invalidate_code_cache(text.name)
+        if not message.get("run"):
+            return {"ok": True, "message": f"Text '{text.name}' replaced"}
+    if text is None:
+        return {"ok": False, "message": f"Text '{name}' not found"}
+    ok, msg = run_text_block(text)
+    return {"ok": ok, "message": msg}
+
+
+def push_server_timer():
+    start_time = time.perf_counter()
+    if _push_server.poll(handle_push_message) and _trace["recorder"] is not None:
+        _trace["recorder"].record("push_server", "TIMER", start_time, time.perf_counter())
+    return PUSH_SERVER_INTERVAL if _push_server.running else None
+
+
+def update_push_server(addon_prefs):
+    """按插件设置启动、重启或停止推送服务"""
+    if _push_server.running:
+        _push_server.stop()
+    if addon_prefs.use_push_server:
+        if not bpy.app.online_access:
+            print("ScriptManager: Push server not started, online access is disabled in the preferences")
+            return
+        if not addon_prefs.push_server_token:
+            addon_prefs.push_server_token = secrets.token_hex(16)
+        try:
+            _push_server.start(addon_prefs.push_server_port)
+        except OSError as e:
+            print(f"ScriptManager: Cannot start push server on port {addon_prefs.push_server_port}: {e}")
+            return
+        if not bpy.app.timers.is_registered(push_server_timer):
+            bpy.app.timers.register(push_server_timer, first_interval=PUSH_SERVER_INTERVAL, persistent=True)
+        print(f"ScriptManager: Push server listening on 127.0.0.1:{_push_server.address[1]}")
+    elif bpy.app.timers.is_registered(push_server_timer):
+        bpy.app.timers.unregister(push_server_timer)
+
+
+def push_server_update(self, context):
+    update_push_server(self)
+
+
 class ScriptManagerAddonPreferences(bpy.types.AddonPreferences):
     bl_idname = __name__  # 插件的 module 名
     vscode_path: bpy.props.StringProperty(name=_("VSCode Path"), subtype="FILE_PATH")
+    use_push_server: BoolProperty(name="Push Server", description="Accept code updates from an external editor on a localhost port", default=False, update=push_server_update)
+    push_server_port: IntProperty(name="Port", default=9876, min=1024, max=65535, update=push_server_update)
+    push_server_token: StringProperty(name="Token", description="Every message must carry this token, a random one is generated when the server starts without one")
 
     def draw(self, context):
         layout = self.layout
         layout.prop(self, "vscode_path")
+        row = layout.row()
+        row.prop(self, "use_push_server", text=_("Push server"))
+        row.prop(self, "push_server_port", text=_("Port"))
+        row = layout.row(align=True)
+        row.prop(self, "push_server_token", text=_("Token"))
+        row.operator(SCRIPTMANAGER_OT_regenerate_push_token.bl_idname, text="", icon="FILE_REFRESH")
+        if self.use_push_server and not bpy.app.online_access:
+            layout.label(text=_("Online access is disabled, the push server is not running"), icon="ERROR")
+
+
+class SCRIPTMANAGER_OT_regenerate_push_token(bpy.types.Operator):
+    bl_idname = "script_manager.regenerate_push_token"
+    bl_label = "Regenerate Token"
+    bl_description = "Replace the push server token with a new random one"
+
+    def execute(self, context):
+        context.preferences.addons[__name__].preferences.push_server_token = secrets.token_hex(16)
+        return {"FINISHED"}
 
 
 class SCRIPTMANAGER_OT_remove_all_handlers(bpy.types.Operator):
@@ -58,15 +163,20 @@ class SCRIPTMANAGER_OT_remove_addon_handlers(bpy.types.Operator):
 
     def execute(self, context):
         for handler in list(bpy.app.handlers.frame_change_pre):
-            if hasattr(handler, "_ScriptManagerItem_FC_ID"):
+            if is_script_manager_handler(handler):
                 bpy.app.handlers.frame_change_pre.remove(handler)
         for handler in list(bpy.app.handlers.depsgraph_update_post):
-            if hasattr(handler, "_ScriptManagerItem_DC_ID"):
+            if is_script_manager_handler(handler):
                 bpy.app.handlers.depsgraph_update_post.remove(handler)
+        for handler in list(bpy.app.handlers.frame_change_post):
+            if is_script_manager_handler(handler):
+                bpy.app.handlers.frame_change_post.remove(handler)
         prefs = context.scene.text_manager_prefs
         for item in prefs.text_manager_collection:
             item.run_in_desgaph_update = False
             item.run_in_frame_update = False
+        for item in prefs.preview_properties:
+            item.watch = False
         return {"FINISHED"}
 
 
@@ -112,9 +222,15 @@ class SCRIPTMANAGER_OT_add_item(bpy.types.Operator):
         item = prefs.text_manager_collection.add()
         item.text_name = "New Text"
         prefs.script_manager_index = len(prefs.text_manager_collection) - 1
+        mark_dispatch_index_dirty()
         return {"FINISHED"}
 
 
+def cancel_item_jobs(item):
+    if item.text_pointer:
+        cancel_script_jobs(text_item_key(item.text_pointer.name))
+
+
 class SCRIPTMANAGER_OT_remove_item(bpy.types.Operator):
     bl_idname = "script_manager.remove_item"
     bl_label = "Remove Item"
@@ -128,6 +244,7 @@ class SCRIPTMANAGER_OT_remove_item(bpy.types.Operator):
         if selected_indices:
             # 倒序删除，避免索引错位
             for idx in reversed(selected_indices):
+                cancel_item_jobs(prefs.text_manager_collection[idx])
                 prefs.text_manager_collection.remove(idx)
             # 更新 active_index
             prefs.script_manager_index = min(selected_indices[0], len(prefs.text_manager_collection) - 1)
@@ -135,8 +252,10 @@ class SCRIPTMANAGER_OT_remove_item(bpy.types.Operator):
             # 如果没有选中项，就删除当前 active_index
             idx = prefs.script_manager_index
             if 0 <= idx < len(prefs.text_manager_collection):
+                cancel_item_jobs(prefs.text_manager_collection[idx])
                 prefs.text_manager_collection.remove(idx)
                 prefs.script_manager_index = max(0, idx - 1)
+        sync_dispatch_handlers(context.scene)
         return {"FINISHED"}
 
 
@@ -151,6 +270,7 @@ class SCRIPTMANAGER_OT_move_item_up(bpy.types.Operator):
         if idx > 0:
             prefs.text_manager_collection.move(idx, idx - 1)
             prefs.script_manager_index = idx - 1
+            mark_dispatch_index_dirty()
         return {"FINISHED"}
 
 
@@ -172,6 +292,7 @@ class SCRIPTMANAGER_OT_new_text(bpy.types.Operator):
         item.text_name = new_text.name
         item.text_pointer = new_text
         prefs.script_manager_index = len(prefs.text_manager_collection) - 1
+        mark_dispatch_index_dirty()
 
         return {"FINISHED"}
 
@@ -191,6 +312,7 @@ class SCRIPTMANAGER_OT_move_item_down(bpy.types.Operator):
         if idx < len(prefs.text_manager_collection) - 1:
             prefs.text_manager_collection.move(idx, idx + 1)
             prefs.script_manager_index = idx + 1
+            mark_dispatch_index_dirty()
         return {"FINISHED"}
 
 
@@ -322,16 +444,285 @@ class SCRIPT_MANAGER_OT_remove_preview_property(bpy.types.Operator):
         prefs = context.scene.text_manager_prefs
         if prefs.preview_properties:
             prefs.preview_properties.remove(len(prefs.preview_properties) - 1)
+            sync_preview_watch_handler(context.scene)
         return {"FINISHED"}
 
 
-def run_text_block(text: bpy.types.Text):
+# NOTE 属性预览的解析器缓存: 路径 -> PreviewResolver, 以及路径 -> 最近一次采样
+_preview_resolvers = {}
+_preview_samples = {}
+PREVIEW_ID_PATH = re.compile(r"""^bpy\.data\.(\w+)\[(["'])(.+?)\2\](.*)$""")
+
+
+class PreviewResolver:
+    """预览路径只编译一次: bpy.data["名称"] 开头的路径按名称查找数据块后用 path_resolve 解析,
+    其他路径使用预编译的表达式"""
+
+    def __init__(self, path):
+        self.path = path
+        self.collection = None
+        owner_path, _, self.attr = path.rpartition(".")
+        self.code = compile(path, "<preview>", "eval")
+        self.owner_code = None
+        if owner_path:
+            try:
+                self.owner_code = compile(owner_path, "<preview>", "eval")
+            except SyntaxError:
+                # 最后一个 "." 在名称中, 例如 bpy.data.objects["Cube.001"]
+                pass
+        match = PREVIEW_ID_PATH.match(path)
+        if match is not None:
+            self.collection, self.id_name, rest = match.group(1), match.group(3), match.group(4)
+            self.rest = rest[1:] if rest.startswith(".") else rest
+            self.owner_rest, _, attr = self.rest.rpartition(".")
+            self.attr = attr if self.rest else None
+
+    def namespace(self):
+        return {"bpy": bpy, "context": bpy.context}
+
+    def get_id(self):
+        return getattr(bpy.data, self.collection)[self.id_name]
+
+    def value(self):
+        if self.collection is not None:
+            try:
+                id_data = self.get_id()
+                return id_data.path_resolve(self.rest) if self.rest else id_data
+            except ValueError:
+                # path_resolve 只支持 RNA 路径, 其他写法退回到表达式
+                self.collection = None
+        return eval(self.code, self.namespace())
+
+    def owner(self):
+        """返回 (属性所属的对象, 属性名), 用于在面板中绘制可编辑的属性"""
+        if self.collection is not None:
+            if not self.rest:
+                return None, None
+            id_data = self.get_id()
+            return (id_data.path_resolve(self.owner_rest) if self.owner_rest else id_data), self.attr
+        if self.owner_code is None:
+            return None, None
+        return eval(self.owner_code, self.namespace()), self.attr
+
+
+def get_preview_resolver(path):
+    resolver = _preview_resolvers.get(path)
+    if resolver is None:
+        resolver = _preview_resolvers[path] = PreviewResolver(path)
+    return resolver
+
+
+def sample_preview(path, refresh_rate, format_value):
+    """按刷新率采样预览值, 返回 (类型名, 显示文本); 两次采样之间的重绘使用上一次的结果"""
+    now = time.perf_counter()
+    sample = _preview_samples.get(path)
+    if sample is not None and now - sample[0] < 1.0 / refresh_rate:
+        return sample[1]
+    value = get_preview_resolver(path).value()
+    result = (type(value).__name__, format_value(value))
+    _preview_samples[path] = (now, result)
+    return result
+
+
+def invalidate_preview_cache():
+    _preview_resolvers.clear()
+    _preview_samples.clear()
+
+
+def update_preview_path(self, context):
+    # 路径改变后旧的解析器不再需要
+    invalidate_preview_cache()
+    sync_preview_watch_handler(context.scene)
+
+
+# NOTE 监视模式的历史记录: 路径 -> (帧号 RingBuffer, 数值 RingBuffer)
+_preview_history = {}
+
+
+def get_preview_history(path, size):
+    history = _preview_history.get(path)
+    if history is None or history[0].size != size:
+        history = _preview_history[path] = (RingBuffer(size), RingBuffer(size))
+    return history
+
+
+def ScriptManager_preview_watch_handler(scene, depsgraph=None):
+    """帧变化后(驱动器已求值)对监视的预览属性各采样一次"""
+    prefs = scene.text_manager_prefs
+    for item in prefs.preview_properties:
+        if not item.watch or not item.path:
+            continue
+        try:
+            value = get_preview_resolver(item.path).value()
+        except Exception as e:
+            DebugPrint(f"Error sampling preview property: {e}")
+            continue
+        if isinstance(value, (bool, int, float)):
+            frames, values = get_preview_history(item.path, prefs.preview_history_size)
+            frames.append(scene.frame_current)
+            values.append(value)
+
+
+ScriptManager_preview_watch_handler._ScriptManager_dispatch = "PREVIEW_WATCH"
+
+
+def sync_preview_watch_handler(scene):
+    """有监视的预览属性时安装帧变化回调, 并丢弃不再监视的历史记录"""
+    watched = {item.path for item in scene.text_manager_prefs.preview_properties if item.watch and item.path}
+    for path in list(_preview_history):
+        if path not in watched:
+            del _preview_history[path]
+    handlers = bpy.app.handlers.frame_change_post
+    if watched and ScriptManager_preview_watch_handler not in handlers:
+        handlers.append(ScriptManager_preview_watch_handler)
+    elif not watched and ScriptManager_preview_watch_handler in handlers:
+        handlers.remove(ScriptManager_preview_watch_handler)
+    return len(watched)
+
+
+def update_preview_watch(self, context):
+    sync_preview_watch_handler(context.scene)
+
+
+def draw_preview_history(layout, path):
+    frames, values = _preview_history.get(path, (None, None))
+    if values is None or not len(values):
+        layout.label(text=_("Waiting for frame changes (numeric values only)"), icon="TIME")
+        return
+    data = values.values()
+    row = layout.row()
+    row.label(text=_f("min {min:.4f}  max {max:.4f}  last {last:.4f}", min=min(data), max=max(data), last=values.last()))
+    row.operator(SCRIPTMANAGER_OT_export_preview_history.bl_idname, text="", icon="EXPORT").path = path
+    layout.label(text=sparkline(data))
+
+
+class SCRIPTMANAGER_OT_export_preview_history(bpy.types.Operator):
+    bl_idname = "script_manager.export_preview_history"
+    bl_label = "Export History"
+    bl_description = "Export the sampled values of the watched property as CSV"
+
+    path: StringProperty(name="Property Path")
+    filepath: StringProperty(subtype="FILE_PATH")
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            directory = os.path.dirname(bpy.data.filepath) if bpy.data.filepath else bpy.app.tempdir
+            self.filepath = os.path.join(directory, "script_manager_watch.csv")
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def execute(self, context):
+        history = _preview_history.get(self.path)
+        if history is None:
+            self.report({"ERROR"}, _("No sampled values"))
+            return {"CANCELLED"}
+        try:
+            with open(bpy.path.abspath(self.filepath), "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame", self.path])
+                writer.writerows(zip((int(frame) for frame in history[0].values()), history[1].values()))
+        except OSError as e:
+            self.report({"ERROR"}, f"Failed to export history: {e}")
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"History exported: {self.filepath}")
+        return {"FINISHED"}
+
+
+# NOTE 编译缓存: text 名称 -> (内容哈希, code object)
+_code_cache = {}
+_code_cache_stats = {"hits": 0, "misses": 0}
+
+
+def get_compiled_code(text: bpy.types.Text):
+    """返回 text 对应的 code object, 内容未变化时复用缓存"""
+    source = text.as_string()
+    digest = hashlib.md5(source.encode("utf-8")).hexdigest()
+    entry = _code_cache.get(text.name)
+    if entry is not None and entry[0] == digest:
+        _code_cache_stats["hits"] += 1
+        return entry[1]
+    _code_cache_stats["misses"] += 1
+    code = compile(source, text.name, "exec")
+    if entry is not None:
+        # 内容变化后声明的输入输出可能改变, 重新排序
+        mark_dispatch_index_dirty()
+    _code_cache[text.name] = (digest, code)
+    return code
+
+
+def invalidate_code_cache(text_name=None):
+    """移除指定 text 的缓存, 不指定时清空全部缓存"""
+    if text_name is None:
+        _code_cache.clear()
+        _script_namespaces.clear()
+        _code_cache_stats["hits"] = 0
+        _code_cache_stats["misses"] = 0
+    else:
+        _code_cache.pop(text_name, None)
+        _script_namespaces.pop(text_name, None)
+
+
+class SCRIPTMANAGER_OT_clear_code_cache(bpy.types.Operator):
+    bl_idname = "script_manager.clear_code_cache"
+    bl_label = "Clear Code Cache"
+    bl_description = "Drop all compiled scripts and reset the cache counters"
+
+    def execute(self, context):
+        invalidate_code_cache()
+        return {"FINISHED"}
+
+
+# NOTE 每个脚本独立的命名空间: text 名称 -> (code object, namespace)
+_script_namespaces = {}
+
+# 触发类型对应的入口函数, 脚本未定义时每次触发都执行整个脚本
+ENTRY_POINTS = {
+    "FRAME": "on_frame",  # on_frame(scene)
+    "DEPSGRAPH": "on_depsgraph",  # on_depsgraph(scene, depsgraph)
+    "MSGBUS": "on_trigger",  # on_trigger(), 按类型订阅时为 on_trigger(changed)
+}
+
+
+def get_script_namespace(text: bpy.types.Text, code, reset=False):
+    """返回脚本的命名空间, 代码变化时重建并执行模块主体, 第二个返回值表示本次是否执行了主体"""
+    entry = _script_namespaces.get(text.name)
+    if entry is not None and entry[0] is code and not reset:
+        return entry[1], False
+    namespace = {"__name__": "__main__", "__file__": text.name, "bpy": bpy, "bulk": bulk, "jobs": get_thread_jobs(text.name)}
+    _script_namespaces[text.name] = (code, namespace)
+    try:
+        exec(code, namespace)
+    except Exception:
+        # 主体执行失败时不保留半初始化的命名空间, 下次触发重新执行
+        _script_namespaces.pop(text.name, None)
+        raise
+    return namespace, True
+
+
+def run_text_block(text: bpy.types.Text, trigger=None, *args):
+    """执行脚本, trigger 为空时(手动运行)在新的命名空间中执行整个脚本"""
     if text is None:
         return False, "No text block provided"
     try:
-        code = text.as_string()
-        # 使用 Blender 全局环境
-        exec(code, globals())
+        code = get_compiled_code(text)
+        owner = current_job_owner(text)
+        jobs = get_thread_jobs(text.name)
+        # 模块主体和入口函数中提交的任务都记在当前条目下
+        previous, jobs.owner = jobs.owner, owner
+        try:
+            namespace, body_executed = get_script_namespace(text, code, reset=trigger is None)
+            entry_point = namespace.get(ENTRY_POINTS.get(trigger, ""))
+            if inspect.iscoroutinefunction(entry_point):
+                # async 入口函数交给事件循环, 不阻塞当前的触发
+                _async_loop.start(owner, entry_point(*args))
+                ensure_async_pump()
+                return True, f"Text '{text.name}' scheduled"
+            if callable(entry_point):
+                entry_point(*args)
+            elif not body_executed:
+                exec(code, namespace)
+        finally:
+            jobs.owner = previous
 
         return True, f"Text '{text.name}' executed"
     except Exception as e:
@@ -339,6 +730,296 @@ def run_text_block(text: bpy.types.Text):
         return False, f"Error running '{text.name}': {e}"
 
 
+# NOTE 后台任务完成后回到主线程执行的队列, 以及常驻的进程池和线程池
+_main_thread_queue = MainThreadQueue()
+_process_pool = ProcessPool()
+_thread_pool = ThreadPool()
+# text 名称 -> ThreadJobs, 脚本命名空间重建后仍能取消之前提交的任务
+_thread_jobs = {}
+_async_loop = AsyncLoop()
+
+
+def main_thread_queue_timer():
+    """在主线程执行后台任务的完成回调, 每次最多占用 main_thread_budget 毫秒, 没有未完成的任务时停止"""
+    _main_thread_queue.drain(bpy.context.scene.text_manager_prefs.main_thread_budget / 1000)
+    return 0.01 if _main_thread_queue.busy() else None
+
+
+def ensure_main_thread_pump():
+    if not bpy.app.timers.is_registered(main_thread_queue_timer):
+        bpy.app.timers.register(main_thread_queue_timer, first_interval=0.01)
+
+
+def async_loop_timer():
+    """步进 asyncio 事件循环, 没有未完成的协程时停止"""
+    return 0.01 if _async_loop.step(bpy.context.scene.text_manager_prefs.async_time_slice / 1000) else None
+
+
+def ensure_async_pump():
+    if not bpy.app.timers.is_registered(async_loop_timer):
+        bpy.app.timers.register(async_loop_timer, first_interval=0.0)
+
+
+def get_thread_executor():
+    return _thread_pool.get(bpy.context.scene.text_manager_prefs.thread_pool_workers)
+
+
+def get_thread_jobs(text_name):
+    jobs = _thread_jobs.get(text_name)
+    if jobs is None:
+        jobs = _thread_jobs[text_name] = ThreadJobs(text_name, get_thread_executor, _main_thread_queue, ensure_main_thread_pump)
+    return jobs
+
+
+def cancel_script_jobs(key=None):
+    """取消指定条目(条目键)启动的后台任务和协程, 不指定时取消全部"""
+    for jobs in _thread_jobs.values():
+        jobs.cancel(key)
+    _async_loop.cancel(key)
+
+
+def current_job_owner(text):
+    """调度执行时为正在运行的条目, 手动运行时为同名的脚本条目"""
+    return _dispatch_guard["running"] or text_item_key(text.name)
+
+
+def apply_offload_result(key, future):
+    """在主线程用 apply(result) 应用进程池的结果, 同一个任务只应用一次"""
+    runtime = get_item_runtime(key)
+    if future is not runtime.offload_future or future is runtime.offload_applied:
+        return
+    runtime.offload_applied = future
+    try:
+        result, compute_time = future.result()
+    except Exception as e:
+        print(f"ScriptManager: compute() failed in worker process: {e}")
+        return
+    # 主线程只负责提交和等待, 统计和时间预算使用工作进程中 compute 的耗时
+    scene = bpy.context.scene
+    record_run_time(runtime, find_text_item(scene, key[1]) if key[0] == "TEXT" else None, runtime.offload_trigger, compute_time, scene.text_manager_prefs.budget_window)
+    runtime.offload_result = result
+    runtime.has_offload_result = True
+    try:
+        runtime.offload_apply(result)
+    except Exception as e:
+        print(f"ScriptManager: apply() failed: {e}")
+
+
+def finish_offload(key, future):
+    _main_thread_queue.end()
+    apply_offload_result(key, future)
+
+
+def run_offloaded(key, policy, text: bpy.types.Text, trigger, *args):
+    """进程池执行模式: prepare(*args) 在主线程收集输入, compute(inputs) 在工作进程中计算,
+    apply(result) 再回到主线程应用结果. WAIT 提交后等待本次的结果并立即应用,
+    SKIP/LAST 在上一次的结果未返回时跳过或使用上一次的结果"""
+    if text is None:
+        return False, "No text block provided"
+    runtime = get_item_runtime(key)
+    try:
+        code = get_compiled_code(text)
+        namespace, body_executed = get_script_namespace(text, code)
+        compute, apply = namespace.get("compute"), namespace.get("apply")
+        if not callable(compute) or not callable(apply):
+            raise RuntimeError("the script must define compute(inputs) and apply(result) to run in the process pool")
+        prefs = bpy.context.scene.text_manager_prefs
+        future = runtime.offload_future
+        if future is not None and future is not runtime.offload_applied:
+            if future.done():
+                # 结果已返回但定时器还没有应用
+                apply_offload_result(key, future)
+            elif policy == "SKIP":
+                return True, f"Text '{text.name}' skipped, result still pending"
+            elif policy == "LAST":
+                if runtime.has_offload_result:
+                    apply(runtime.offload_result)
+                return True, f"Text '{text.name}' reused the last result"
+            # WAIT: 上一次等待超时的任务已过时, 提交新任务后它的结果不再应用
+        prepare = namespace.get("prepare")
+        inputs = prepare(*args) if callable(prepare) else None
+        source = text.as_string()
+        digest = hashlib.md5(source.encode("utf-8")).hexdigest()
+        future = _process_pool.submit_compute(prefs.process_pool_workers, text.name, digest, source, inputs)
+        runtime.offload_future = future
+        runtime.offload_apply = apply
+        runtime.offload_trigger = trigger
+        _main_thread_queue.begin()
+        # 完成回调在进程池的管理线程中调用, 只能把结果交给主线程处理
+        future.add_done_callback(lambda done: _main_thread_queue.put(functools.partial(finish_offload, key, done)))
+        ensure_main_thread_pump()
+        if policy == "WAIT":
+            done, _pending = concurrent.futures.wait([future], timeout=prefs.offload_wait_timeout / 1000)
+            if not done:
+                return True, f"Text '{text.name}' timed out waiting for the result, it will be applied when it arrives"
+            apply_offload_result(key, future)
+            return True, f"Text '{text.name}' applied the result from the process pool"
+        return True, f"Text '{text.name}' submitted to the process pool"
+    except Exception as e:
+        print(f"Error running '{text.name}': {e}")
+        return False, f"Error running '{text.name}': {e}"
+
+
+class SCRIPTMANAGER_OT_resume_item(bpy.types.Operator):
+    bl_idname = "script_manager.resume_item"
+    bl_label = "Resume"
+    bl_description = "Clear the warning, throttled or suspended state of the item"
+
+    kind: StringProperty(name="Kind")
+    name: StringProperty(name="Name")
+
+    def execute(self, context):
+        reset_item_runtime(parse_item_key(self.kind, self.name))
+        return {"FINISHED"}
+
+
+class SCRIPTMANAGER_OT_cancel_jobs(bpy.types.Operator):
+    bl_idname = "script_manager.cancel_jobs"
+    bl_label = "Cancel Jobs"
+    bl_description = "Cancel the background jobs and async tasks started by the item"
+
+    kind: StringProperty(name="Kind")
+    name: StringProperty(name="Name")
+
+    def execute(self, context):
+        cancel_script_jobs(parse_item_key(self.kind, self.name))
+        return {"FINISHED"}
+
+
+class SCRIPTMANAGER_OT_reset_timing_stats(bpy.types.Operator):
+    bl_idname = "script_manager.reset_timing_stats"
+    bl_label = "Reset Timing Statistics"
+
+    kind: StringProperty(name="Kind")
+    name: StringProperty(name="Name")
+
+    def execute(self, context):
+        for timings in get_item_runtime(parse_item_key(self.kind, self.name)).timings.values():
+            timings.clear()
+        return {"FINISHED"}
+
+
+class SCRIPTMANAGER_OT_profile_runs(bpy.types.Operator):
+    bl_idname = "script_manager.profile_runs"
+    bl_label = "Profile Next Runs"
+    bl_description = "Profile the next triggered runs of the item with cProfile"
+
+    kind: StringProperty(name="Kind")
+    name: StringProperty(name="Name")
+
+    def execute(self, context):
+        runs = context.scene.text_manager_prefs.profile_runs
+        get_item_runtime(parse_item_key(self.kind, self.name)).profile = ProfileCapture(runs)
+        self.report({"INFO"}, _f("Profiling the next {num} runs", num=runs))
+        return {"FINISHED"}
+
+
+class SCRIPTMANAGER_OT_dump_profile(bpy.types.Operator):
+    bl_idname = "script_manager.dump_profile"
+    bl_label = "Save Profile"
+    bl_description = "Save the collected profile as a .prof file next to the blend file"
+
+    kind: StringProperty(name="Kind")
+    name: StringProperty(name="Name")
+
+    def execute(self, context):
+        profile = get_item_runtime(parse_item_key(self.kind, self.name)).profile
+        if profile is None or profile.stats is None:
+            self.report({"ERROR"}, _("No profile collected"))
+            return {"CANCELLED"}
+        # 未保存的文件写到临时目录
+        directory = os.path.dirname(bpy.data.filepath) if bpy.data.filepath else bpy.app.tempdir
+        filename = bpy.path.clean_name(f"{self.kind}_{self.name}") + ".prof"
+        filepath = os.path.join(directory, filename)
+        try:
+            profile.dump(filepath)
+        except OSError as e:
+            self.report({"ERROR"}, f"Failed to save profile: {e}")
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"Profile saved: {filepath}")
+        return {"FINISHED"}
+
+
+class SCRIPTMANAGER_OT_line_profile_runs(bpy.types.Operator):
+    bl_idname = "script_manager.line_profile_runs"
+    bl_label = "Line Profile Next Runs"
+    bl_description = "Record time and hit count per source line over the next triggered runs"
+
+    kind: StringProperty(name="Kind")
+    name: StringProperty(name="Name")
+    text_name: StringProperty(name="Text Name")
+
+    def execute(self, context):
+        runs = context.scene.text_manager_prefs.profile_runs
+        get_item_runtime(parse_item_key(self.kind, self.name)).line_profile = LineProfileCapture(runs, self.text_name)
+        self.report({"INFO"}, _f("Profiling the next {num} runs", num=runs))
+        return {"FINISHED"}
+
+
+class SCRIPTMANAGER_OT_jump_to_line(bpy.types.Operator):
+    bl_idname = "script_manager.jump_to_line"
+    bl_label = "Jump To Line"
+    bl_description = "Show the line in the Text Editor"
+
+    text_name: StringProperty(name="Text Name")
+    line: IntProperty(name="Line", default=1, min=1)
+
+    def execute(self, context):
+        text = bpy.data.texts.get(self.text_name)
+        if text is None:
+            self.report({"ERROR"}, _("No text selected"))
+            return {"CANCELLED"}
+        area, space = find_text_editor_space()
+        if space is None:
+            self.report({"ERROR"}, _("No Text Editor found"))
+            return {"CANCELLED"}
+        space.text = text
+        line_index = min(self.line, len(text.lines)) - 1
+        text.current_line_index = line_index
+        text.select_end_line_index = line_index
+        space.top = max(0, line_index - 10)
+        area.tag_redraw()
+        return {"FINISHED"}
+
+
+class SCRIPTMANAGER_OT_export_trace(bpy.types.Operator):
+    bl_idname = "script_manager.export_trace"
+    bl_label = "Export Trace"
+    bl_description = "Export recorded dispatch events as Chrome Trace Event JSON for Perfetto"
+
+    filepath: StringProperty(subtype="FILE_PATH")
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            directory = os.path.dirname(bpy.data.filepath) if bpy.data.filepath else bpy.app.tempdir
+            self.filepath = os.path.join(directory, "script_manager_trace.json")
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def execute(self, context):
+        recorder = _trace["recorder"]
+        if recorder is None:
+            self.report({"ERROR"}, _("Tracing is not enabled"))
+            return {"CANCELLED"}
+        try:
+            recorder.export(bpy.path.abspath(self.filepath))
+        except OSError as e:
+            self.report({"ERROR"}, f"Failed to export trace: {e}")
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"Trace exported: {self.filepath}")
+        return {"FINISHED"}
+
+
+class SCRIPTMANAGER_OT_clear_trace(bpy.types.Operator):
+    bl_idname = "script_manager.clear_trace"
+    bl_label = "Clear Trace"
+
+    def execute(self, context):
+        if _trace["recorder"] is not None:
+            _trace["recorder"].clear()
+        return {"FINISHED"}
+
+
 class SCRIPTMANAGER_OT_run_text(bpy.types.Operator):
     bl_idname = "script_manager.run_text"
     bl_label = "Run Text"
@@ -353,7 +1034,8 @@ class SCRIPTMANAGER_OT_run_text(bpy.types.Operator):
         return {"FINISHED"} if ok else {"CANCELLED"}
 
 
-auto_reload_flag = False
+# NOTE 自动重载的耗时和状态只保存在内存中, 避免定时器每次写场景属性引起依赖图更新
+_auto_reload_state = {"time": 0.0, "flag": False}
 
 
 class PT_SCRIPTMANAGERPanel(bpy.types.Panel):
@@ -379,8 +1061,11 @@ class PT_SCRIPTMANAGERPanel(bpy.types.Panel):
         row = col.row()
         split = row.split(factor=0.8)
         split.prop(scene.text_manager_prefs, "use_auto_reload_timer", text=_("Use Auto Reload Timer"), icon="TIME")
-        split.label(text=f"{scene.text_manager_prefs.auto_reload_use_time:.2f}ms", icon="RECORD_OFF" if not auto_reload_flag else "RECORD_ON")
+        split.label(text=f"{_auto_reload_state['time']:.2f}ms", icon="RECORD_OFF" if not _auto_reload_state["flag"] else "RECORD_ON")
         col.prop(scene.text_manager_prefs, "auto_reload_timer_interval", text=_("Auto-reload timer interval"))
+        row = col.row()
+        row.enabled = _file_watcher.available
+        row.prop(scene.text_manager_prefs, "use_file_watcher", text=_("Watch files (inotify)"), icon="HIDE_OFF")
 
 
 class PT_SCRIPTMANAGERSubPanel(bpy.types.Panel):
@@ -403,27 +1088,151 @@ class PT_SCRIPTMANAGERSubPanel(bpy.types.Panel):
                 row.operator("script_manager.run_text", text="Run", icon="PLAY").text_name = item.text_pointer.name
                 row = box.row()
                 row.operator("text_manager.open_in_vscode", text="Open in VSCode", icon="TEXT").text_name = item.text_pointer.name
+                runtime = get_item_runtime(text_item_key(item.text_pointer.name))
                 row = box.row()
                 row.enabled = False
-                row.label(icon="RECORD_OFF" if not item.updata_flag else "RECORD_ON")
+                row.label(icon="RECORD_OFF" if not runtime.flag else "RECORD_ON")
                 row.enabled = True
                 row.prop(item, "text_pointer", text="")
                 box.prop(item.text_pointer, "filepath", text="Filepath")
                 box.prop(item, "auto_reload", text="Auto Reload", icon="FILE_REFRESH")
+                draw_runtime_status(box, runtime, text_item_key(item.text_pointer.name))
+                draw_timing_stats(box, runtime, text_item_key(item.text_pointer.name))
+                draw_profile(box, runtime, text_item_key(item.text_pointer.name))
+                draw_line_profile(box, runtime, text_item_key(item.text_pointer.name), item.text_pointer)
                 row1 = box.row()
                 split = row1.split(factor=0.8)
                 split.prop(item, "run_in_frame_update", text="Run In Frame Update", icon="PLAY")
-                split.label(text=f"{item.frame_update_run_time:.2f}ms", icon="RECORD_OFF" if not item.frame_update_flag else "RECORD_ON")
+                split.label(text=f"{runtime.run_times.get('FRAME', 0.0):.2f}ms", icon="RECORD_OFF" if not runtime.trigger_flags.get("FRAME") else "RECORD_ON")
+                inputs, outputs = get_script_declarations(item.text_pointer)
+                row1 = box.row(align=True)
+                row1.prop(item, "skip_unchanged_inputs", text=_("Skip when inputs unchanged"), icon="LINKED")
+                row1.label(text=_f("{inputs} inputs / {outputs} outputs, skipped {num}", inputs=len(inputs), outputs=len(outputs), num=runtime.skipped))
+                row1 = box.row(align=True)
+                row1.prop(item, "execution_mode", text="")
+                if item.execution_mode == "PROCESS":
+                    row1.prop(item, "pending_policy", text="")
+                key = text_item_key(item.text_pointer.name)
+                jobs = _thread_jobs.get(item.text_pointer.name)
+                num_jobs = jobs.count(key) if jobs is not None else 0
+                num_tasks = _async_loop.count(key)
+                if num_jobs or num_tasks:
+                    row1 = box.row(align=True)
+                    if num_jobs:
+                        row1.label(text=_f("Background jobs: {num}", num=num_jobs), icon="SORTTIME")
+                    if num_tasks:
+                        row1.label(text=_f("Async tasks: {num} ({time:.2f}ms/tick)", num=num_tasks, time=_async_loop.tick_times.last() or 0.0), icon="UV_SYNC_SELECT")
+                    op = row1.operator(SCRIPTMANAGER_OT_cancel_jobs.bl_idname, text="", icon="CANCEL")
+                    op.kind, op.name = key
+                row1 = box.row(align=True)
+                row1.prop(item, "priority", text=_("Priority"), icon="SORTSIZE")
+                row1 = box.row(align=True)
+                row1.prop(item, "time_budget", text=_("Time Budget (ms)"), icon="TIME")
+                if item.time_budget > 0:
+                    row1.prop(item, "budget_action", text="")
+                    if item.budget_action == "THROTTLE":
+                        row1.prop(item, "throttle_step", text=_("Every"))
                 row1 = box.row()
                 split = row1.split(factor=0.8)
                 split.prop(item, "run_in_desgaph_update", text="Run In Depsgraph Update", icon="FILE_REFRESH")
-                split.label(text=f"{item.desgaph_update_run_time:.2f}ms", icon="RECORD_OFF" if not item.desgaph_updata_flag else "RECORD_ON")
+                split.label(text=f"{runtime.run_times.get('DEPSGRAPH', 0.0):.2f}ms", icon="RECORD_OFF" if not runtime.trigger_flags.get("DEPSGRAPH") else "RECORD_ON")
+                if item.run_in_desgaph_update:
+                    sub = box.box()
+                    sub.prop(item, "use_depsgraph_filter", text=_("Only run for matching updates"), icon="FILTER")
+                    if item.use_depsgraph_filter:
+                        sub.prop(item, "depsgraph_filter_id_types", text="")
+                        sub.prop(item, "depsgraph_filter_names", text="", icon="VIEWZOOM")
+                        row1 = sub.row(align=True)
+                        row1.prop(item, "depsgraph_filter_geometry", toggle=True)
+                        row1.prop(item, "depsgraph_filter_transform", toggle=True)
+                        row1.prop(item, "depsgraph_filter_shading", toggle=True)
+                    draw_debounce_settings(sub, item, ("DEPSGRAPH", item.text_pointer.name))
             else:
                 box.label(text=_("No text data block specified"))
         else:
             box.label(text=_("No available text data block"))
 
 
+def draw_runtime_status(layout, runtime, key):
+    if runtime.status != "OK":
+        row = layout.row()
+        row.alert = runtime.status == "SUSPENDED"
+        row.label(text=runtime.status_message, icon=RUNTIME_STATUS_ICONS.get(runtime.status, "ERROR"))
+        op = row.operator("script_manager.resume_item", text="", icon="LOOP_FORWARDS")
+        op.kind, op.name = key[0], str(key[1])
+    if runtime.suppressed:
+        layout.label(text=_f("Suppressed self-triggered updates: {num}", num=runtime.suppressed), icon="LOOP_BACK")
+
+
+def draw_timing_stats(layout, runtime, key):
+    prefs = bpy.context.scene.text_manager_prefs
+    row = layout.row()
+    row.prop(prefs, "display_timing_stats", text=_("Timing statistics"), icon="TRIA_DOWN" if prefs.display_timing_stats else "TRIA_RIGHT", emboss=False)
+    if not prefs.display_timing_stats:
+        return
+    row.prop(prefs, "display_timing_histogram", text="", icon="SEQ_HISTOGRAM")
+    op = row.operator("script_manager.reset_timing_stats", text="", icon="TRASH")
+    op.kind, op.name = key[0], str(key[1])
+    col = layout.column(align=True)
+    if not runtime.timings:
+        col.label(text=_("No samples yet"))
+    for trigger, timings in runtime.timings.items():
+        summary = summarize(timings)
+        if summary is None:
+            continue
+        col.label(text=f"{trigger}  n={summary['count']}")
+        col.label(text=f"min {summary['min']:.2f}  mean {summary['mean']:.2f}  p50 {summary['p50']:.2f}  p95 {summary['p95']:.2f}  max {summary['max']:.2f} ms")
+        if prefs.display_timing_histogram:
+            for line in histogram(timings.values()):
+                col.label(text=line)
+
+
+def draw_profile(layout, runtime, key):
+    prefs = bpy.context.scene.text_manager_prefs
+    row = layout.row(align=True)
+    op = row.operator("script_manager.profile_runs", text=_("Profile next runs"), icon="PREVIEW_RANGE")
+    op.kind, op.name = key[0], str(key[1])
+    row.prop(prefs, "profile_runs", text="")
+    profile = runtime.profile
+    if profile is None:
+        return
+    box = layout.box()
+    row = box.row()
+    row.label(text=_f("Profiled {done}/{total} runs", done=profile.total_runs - profile.remaining, total=profile.total_runs))
+    op = row.operator("script_manager.dump_profile", text="", icon="EXPORT")
+    op.kind, op.name = key[0], str(key[1])
+    col = box.column(align=True)
+    for cumulative, own, calls, name in profile.top_functions():
+        col.label(text=f"{cumulative:8.2f}ms {own:8.2f}ms {calls:6d}  {name}")
+
+
+def draw_line_profile(layout, runtime, key, text):
+    row = layout.row(align=True)
+    op = row.operator("script_manager.line_profile_runs", text=_("Line profile next runs"), icon="ALIGN_JUSTIFY")
+    op.kind, op.name, op.text_name = key[0], str(key[1]), text.name
+    line_profile = runtime.line_profile
+    if line_profile is None:
+        return
+    box = layout.box()
+    box.label(text=_f("Profiled {done}/{total} runs", done=line_profile.total_runs - line_profile.remaining, total=line_profile.total_runs))
+    col = box.column(align=True)
+    for line, total, hits in line_profile.hot_lines():
+        source = text.lines[line - 1].body.strip() if line <= len(text.lines) else ""
+        row = col.row(align=True)
+        op = row.operator("script_manager.jump_to_line", text=f"{line}", emboss=True)
+        op.text_name, op.line = text.name, line
+        row.label(text=f"{total:8.2f}ms {hits:6d}x  {source[:40]}")
+
+
+def draw_debounce_settings(layout, item, key):
+    row = layout.row(align=True)
+    row.prop(item, "use_debounce", text=_("Debounce"), icon="MOD_TIME")
+    if item.use_debounce:
+        row.prop(item, "debounce_interval", text="")
+        row.prop(item, "debounce_edge", text="")
+        row.label(text=_f("Coalesced: {num}", num=get_coalesced_count(key)))
+
+
 class PT_SCRIPTMANAGERTools(bpy.types.Panel):
     bl_idname = "OBJECT_PT_script_manager_tools"
     bl_label = "Tools"
@@ -444,23 +1253,26 @@ class PT_SCRIPTMANAGERTools(bpy.types.Panel):
         row = box.row()
         row.operator("script_manager.add_preview_property", text="Add", icon="ADD")
         row.operator("script_manager.remove_preview_property", text="Remove", icon="REMOVE")
+        row = box.row(align=True)
+        row.prop(prefs, "preview_refresh_rate", text=_("Refresh rate (Hz)"))
+        row.prop(prefs, "preview_history_size", text=_("History"))
 
         # 属性列表
         box1 = box.box()
         for item in prefs.preview_properties:
             row = box1.row()
+            row.prop(item, "watch", text="", icon="GRAPH")
             row.prop(item, "path", text="")
 
             if item.path:
                 try:
-                    value = eval(item.path)
+                    type_name, display_val = sample_preview(item.path, prefs.preview_refresh_rate, self.format_value)
                     # 显示类型和值
                     row1 = row.row()
                     row1.alignment = "RIGHT"
-                    row1.label(text=f"{type(value).__name__}")
-                    display_val = self.format_value(value)
+                    row1.label(text=f"{type_name}")
                     row1.label(text=f"{display_val}")
-                    obj, attr_name = eval(f"({item.path.rsplit('.',1)[0]}, '{item.path.rsplit('.',1)[1]}')")
+                    obj, attr_name = get_preview_resolver(item.path).owner()
                     if hasattr(obj, "bl_rna") and attr_name in obj.bl_rna.properties:
                         # row.prop(obj, attr_name, text="", index=0)
                         # 如果是向量属性(长度 2 或 3)
@@ -483,6 +1295,8 @@ class PT_SCRIPTMANAGERTools(bpy.types.Panel):
                     row.label(text=f"Error: {e}", icon="ERROR")
             else:
                 row.label(text=_("No property path"))
+            if item.watch and item.path:
+                draw_preview_history(box1.column(align=True), item.path)
 
     def format_value(self, value):
         # 布尔值
@@ -538,16 +1352,47 @@ class PT_SCRIPTMANAGERDebug(bpy.types.Panel):
         col.prop(prefs, "debug_mode", text=_("Print debug info"), icon="SETTINGS")
         col.prop(prefs, "auto_reload_in_file_open", text=_("Restore handlers and triggers when opening file"), icon="FILE_REFRESH")
         col.operator("script_manager.remove_addon_handlers", text=_("Remove plugin handler"))
+        row = col.row()
+        row.label(text=_f("Code cache: {hits} hits / {misses} misses / {num} scripts", hits=_code_cache_stats["hits"], misses=_code_cache_stats["misses"], num=len(_code_cache)))
+        row.operator("script_manager.clear_code_cache", text="", icon="TRASH")
+        col.label(text=_f("Auto reload: {num} files watched / {reads} reads", num=len(_file_stats.entries), reads=_file_stats.reads))
+        col.label(text=_f("Bulk buffers: {num} arrays / {hits} hits / {misses} misses", num=len(bulk.pool.buffers), hits=bulk.pool.hits, misses=bulk.pool.misses))
+        col.prop(prefs, "suppress_self_updates", text=_("Suppress self-triggered updates"), icon="LOOP_BACK")
+        col.prop(prefs, "feedback_loop_count", text=_("Loop limit"))
+        col.prop(prefs, "budget_window", text=_("Time budget window"))
+        row = col.row(align=True)
+        row.prop(prefs, "process_pool_workers", text=_("Worker processes"))
+        row.prop(prefs, "thread_pool_workers", text=_("Worker threads"))
+        col.prop(prefs, "offload_wait_timeout", text=_("Wait timeout (ms)"))
+        row = col.row()
+        row.prop(prefs, "main_thread_budget", text=_("Apply budget (ms)"))
+        row.label(text=_f("Pending jobs: {num}", num=_main_thread_queue.in_flight))
+        row = col.row()
+        row.prop(prefs, "async_time_slice", text=_("Async time slice (ms)"))
+        tick = summarize(_async_loop.tick_times)
+        row.label(text=_f("Async tasks: {num} ({time:.2f}ms/tick)", num=_async_loop.count(), time=tick["mean"] if tick else 0.0))
+        for trigger, label in (("FRAME", _("Frame batch")), ("DEPSGRAPH", _("Depsgraph batch"))):
+            summary = summarize(_batch_timings[trigger]) if trigger in _batch_timings else None
+            if summary is not None:
+                col.label(text=_f("{label}: {mean:.2f}ms mean / {p95:.2f}ms p95", label=label, mean=summary["mean"], p95=summary["p95"]))
+        row = col.row(align=True)
+        row.prop(prefs, "use_tracing", text=_("Record timeline"), icon="SEQUENCE")
+        if _trace["recorder"] is not None:
+            row.label(text=_f("{num} events", num=len(_trace["recorder"].events)))
+            row.operator("script_manager.export_trace", text="", icon="EXPORT")
+            row.operator("script_manager.clear_trace", text="", icon="TRASH")
+        else:
+            row.prop(prefs, "trace_buffer_size", text="")
         col.label(text=_("Plugin handler"))
         box = col.box()
         i = 0
-        for handler in bpy.app.handlers.frame_change_pre:
-            if hasattr(handler, "_ScriptManagerItem_FC_ID"):
-                box.label(text=f"{i}.Frame: {handler._ScriptManagerItem_FC_ID}")
+        if ScriptManager_frame_update_handler in bpy.app.handlers.frame_change_pre:
+            for name in _dispatch_index["FRAME"]:
+                box.label(text=f"{i}.Frame: {name}")
                 i += 1
-        for handler in bpy.app.handlers.depsgraph_update_post:
-            if hasattr(handler, "_ScriptManagerItem_DC_ID"):
-                box.label(text=f"{i}.Deps: {handler._ScriptManagerItem_DC_ID}")
+        if ScriptManager_depsgraph_update_handler in bpy.app.handlers.depsgraph_update_post:
+            for name in _dispatch_index["DEPSGRAPH"]:
+                box.label(text=f"{i}.Deps: {name}")
                 i += 1
         col.operator("script_manager.remove_all_handlers", text=_("Remove all handlers"))
         col.operator("script_manager.remove_handler", text=_("Remove specified handler"))
@@ -576,52 +1421,34 @@ class PT_SCRIPTMANAGERDebug(bpy.types.Panel):
 
 
 def use_frame_update(self, context):
-    # 添加和移除帧更新回调
-    prefs = context.scene.text_manager_prefs
-    item = prefs.text_manager_collection[prefs.script_manager_index]
-    if item.run_in_frame_update:
-        has_handler = False
-        for handler in bpy.app.handlers.frame_change_pre:
-            if hasattr(handler, "_ScriptManagerItem_FC_ID") and handler._ScriptManagerItem_FC_ID == item.text_pointer.name:
-                if item.text_pointer.name in handler._ScriptManagerItem_FC_ID:
-                    bpy.app.handlers.frame_change_pre.remove(handler)
-                    has_handler = True
-        bpy.app.handlers.frame_change_pre.append(make_ScriptManager_frame_update_handler(item.text_pointer.name))
-        if not has_handler:
-            print(_("Add frame update"))
-        else:
-            print(_("Frame update updated"))
+    # 帧更新由统一的调度器执行, 这里只需要同步调度索引
+    if self.text_pointer:
+        reset_item_runtime(text_item_key(self.text_pointer.name))
+    sync_dispatch_handlers(context.scene)
+    if not self.run_in_frame_update and not self.run_in_desgaph_update:
+        cancel_item_jobs(self)
+    if self.run_in_frame_update:
+        print(_("Add frame update"))
     else:
-        for handler in bpy.app.handlers.frame_change_pre:
-            if hasattr(handler, "_ScriptManagerItem_FC_ID"):
-                if item.text_pointer.name in handler._ScriptManagerItem_FC_ID:
-                    bpy.app.handlers.frame_change_pre.remove(handler)
         print(_("Remove frame update"))
 
 
 def use_desgraph_update(self, context):
-    prefs = context.scene.text_manager_prefs
-    item = prefs.text_manager_collection[prefs.script_manager_index]
-    if item.run_in_desgaph_update:
-        has_handler = False
-        for handler in bpy.app.handlers.depsgraph_update_post:
-            if hasattr(handler, "_ScriptManagerItem_DC_ID"):
-                if item.text_pointer.name in handler._ScriptManagerItem_DC_ID:
-                    bpy.app.handlers.depsgraph_update_post.remove(handler)
-                    has_handler = True
-        bpy.app.handlers.depsgraph_update_post.append(make_ScriptManager_depsgraph_update_handler(item.text_pointer.name))
-        if not has_handler:
-            print(_("Add depsgraph update"))
-        else:
-            print(_("Depsgraph update updated"))
+    if self.text_pointer:
+        reset_item_runtime(text_item_key(self.text_pointer.name))
+    sync_dispatch_handlers(context.scene)
+    if not self.run_in_frame_update and not self.run_in_desgaph_update:
+        cancel_item_jobs(self)
+    if self.run_in_desgaph_update:
+        print(_("Add depsgraph update"))
     else:
-        for handler in bpy.app.handlers.depsgraph_update_post:
-            if hasattr(handler, "_ScriptManagerItem_DC_ID"):
-                if item.text_pointer.name in handler._ScriptManagerItem_DC_ID:
-                    bpy.app.handlers.depsgraph_update_post.remove(handler)
         print(_("Remove depsgraph update"))
 
 
+def update_priority(self, context):
+    mark_dispatch_index_dirty()
+
+
 # NOTE 防止使用相同的TEXT
 def update_text_pointer(self, context):
     prefs = context.scene.text_manager_prefs
@@ -635,10 +1462,57 @@ def update_text_pointer(self, context):
             # 重置为 None，或者弹出提示
             item.text_pointer = None
             break
+    sync_dispatch_handlers(context.scene)
 
 
 class ScriptManagerPreviewPropertyItem(bpy.types.PropertyGroup):
-    path: bpy.props.StringProperty(name="Property Path", default="")
+    path: bpy.props.StringProperty(name="Property Path", default="", update=update_preview_path)
+    watch: BoolProperty(name="Watch", description="Sample the value once per frame change and show its history", default=False, update=update_preview_watch)
+
+
+# depsgraph 过滤可选的 ID 类型
+DEPSGRAPH_FILTER_ID_TYPES = [
+    ("OBJECT", "Object", "", "OBJECT_DATA", 1 << 0),
+    ("MESH", "Mesh", "", "MESH_DATA", 1 << 1),
+    ("CURVE", "Curve", "", "CURVE_DATA", 1 << 2),
+    ("MATERIAL", "Material", "", "MATERIAL", 1 << 3),
+    ("NODETREE", "Node Tree", "", "NODETREE", 1 << 4),
+    ("SCENE", "Scene", "", "SCENE_DATA", 1 << 5),
+    ("COLLECTION", "Collection", "", "OUTLINER_COLLECTION", 1 << 6),
+    ("CAMERA", "Camera", "", "CAMERA_DATA", 1 << 7),
+    ("LIGHT", "Light", "", "LIGHT", 1 << 8),
+    ("ARMATURE", "Armature", "", "ARMATURE_DATA", 1 << 9),
+    ("WORLD", "World", "", "WORLD", 1 << 10),
+    ("IMAGE", "Image", "", "IMAGE_DATA", 1 << 11),
+]
+
+
+# 防抖触发沿
+DEBOUNCE_EDGE_ITEMS = [
+    ("LEADING", "Leading", "Run on the first trigger, then drop triggers until the interval has passed since that run"),
+    ("TRAILING", "Trailing", "Run once after the burst has been quiet for the interval"),
+]
+
+
+# 超出时间预算时的处理方式
+BUDGET_ACTION_ITEMS = [
+    ("THROTTLE", "Throttle", "Run only every Nth trigger while over budget"),
+    ("SUSPEND", "Suspend", "Warn first, then suspend the script until it is re-enabled"),
+]
+
+
+# 执行模式, 进程池模式需要脚本定义 compute(inputs) 和 apply(result), 可选 prepare(*args)
+EXECUTION_MODE_ITEMS = [
+    ("MAIN", "Main Thread", "Run the script on Blender's main thread"),
+    ("PROCESS", "Process Pool", "Run compute(inputs) in a worker process and apply(result) on the main thread"),
+]
+
+# 进程池模式下上一次结果未返回时的处理方式
+PENDING_POLICY_ITEMS = [
+    ("WAIT", "Wait", "Block until the result of this trigger arrives, up to the wait timeout"),
+    ("SKIP", "Skip", "Skip this trigger"),
+    ("LAST", "Use Last", "Apply the last result again"),
+]
 
 
 # item属性
@@ -648,20 +1522,33 @@ class ScriptManagerItem(bpy.types.PropertyGroup):
     text_pointer: PointerProperty(type=bpy.types.Text, update=update_text_pointer)
     auto_reload: BoolProperty(name="Auto Reload", default=False)
     run_in_frame_update: BoolProperty(name="Run In Frame Update", default=False, update=use_frame_update)
-    frame_update_flag: BoolProperty(name="flag", default=False)
-    frame_update_run_time: FloatProperty(name="Run Time", default=0.0)
     run_in_desgaph_update: BoolProperty(name="Run In Depsgraph Update", default=False, update=use_desgraph_update)
-    desgaph_updata_flag: BoolProperty(name="flag", default=False)
-    desgaph_update_run_time: FloatProperty(name="Run Time", default=0.0)
-    updata_flag: BoolProperty(name="flag", default=False)
+    use_depsgraph_filter: BoolProperty(name="Filter Depsgraph Updates", default=False)
+    depsgraph_filter_id_types: EnumProperty(name="ID Types", items=DEPSGRAPH_FILTER_ID_TYPES, options={"ENUM_FLAG"}, default=set())
+    depsgraph_filter_names: StringProperty(name="ID Names", description="Comma separated name patterns, e.g. Cube*, Light", default="")
+    depsgraph_filter_geometry: BoolProperty(name="Geometry", default=False)
+    depsgraph_filter_transform: BoolProperty(name="Transform", default=False)
+    depsgraph_filter_shading: BoolProperty(name="Shading", default=False)
+    use_debounce: BoolProperty(name="Debounce", description="Collapse bursts of triggers into a single run", default=False)
+    debounce_interval: FloatProperty(name="Min Interval (ms)", default=100.0, min=0.0)
+    debounce_edge: EnumProperty(name="Edge", items=DEBOUNCE_EDGE_ITEMS, default="TRAILING")
+    time_budget: FloatProperty(name="Time Budget (ms)", description="Average run time allowed per trigger, 0 disables the watchdog", default=0.0, min=0.0)
+    budget_action: EnumProperty(name="Budget Action", items=BUDGET_ACTION_ITEMS, default="THROTTLE")
+    throttle_step: IntProperty(name="Run Every N Triggers", default=4, min=2)
+    priority: IntProperty(name="Priority", description="Scripts with a higher priority run first within a trigger, declared dependencies still come first", default=0, min=-100, max=100, update=update_priority)
+    skip_unchanged_inputs: BoolProperty(name="Skip When Inputs Unchanged", description="Skip the run when none of the INPUTS declared by the script changed since its last run", default=False)
+    execution_mode: EnumProperty(name="Execution Mode", items=EXECUTION_MODE_ITEMS, default="MAIN")
+    pending_policy: EnumProperty(name="Pending Result", items=PENDING_POLICY_ITEMS, default="SKIP")
 
 
 # item面板
 class SCRIPTMANAGER_UL_texts(bpy.types.UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        runtime = get_item_runtime(text_item_key(item.text_pointer.name)) if item.text_pointer else ItemRuntime()
         row = layout.row(align=True)
+        row.alert = runtime.status == "SUSPENDED"
         row.alignment = "LEFT"
-        row.label(icon="RECORD_OFF" if not item.updata_flag else "RECORD_ON")
+        row.label(icon=RUNTIME_STATUS_ICONS.get(runtime.status, "RECORD_ON" if runtime.flag else "RECORD_OFF"))
         row.label(text="-" if item.text_pointer is None or not item.text_pointer.is_dirty else "*")
         row.label(text=f"{index}.")
         row.prop(item, "selected", text="", emboss=False, icon="CHECKBOX_DEHLT" if not item.selected else "CHECKBOX_HLT")
@@ -674,46 +1561,125 @@ class SCRIPTMANAGER_UL_texts(bpy.types.UIList):
 
 def auto_reload_timer_callback():
     """自动重载文本数据块"""
-    global auto_reload_flag
     start_time = time.perf_counter()  # 记录开始时间
     prefs = bpy.context.scene.text_manager_prefs
     # print("自动重载定时器回调")
 
-    for item in prefs.text_manager_collection:
-        text = item.text_pointer
-        if text is None:
-            continue
-        # print(text.name, text.is_modified, text.is_dirty)
-        if text.is_modified and text.filepath and os.path.exists(bpy.path.abspath(text.filepath)) and item.auto_reload:
+    if _file_watcher.running:
+        # 监听线程负责发现文件变化, 这里只同步需要监听的目录
+        sync_file_watches(prefs)
+    else:
+        for item in prefs.text_manager_collection:
+            text = item.text_pointer
+            if text is None or not item.auto_reload or not text.filepath:
+                continue
             reload_text_block(text)
 
+    if _trace["recorder"] is not None:
+        _trace["recorder"].record("auto_reload", "TIMER", start_time, time.perf_counter(), {"frame": bpy.context.scene.frame_current})
+
     # 如果定时器仍然启用，返回下一次调用间隔；否则返回 None 停止定时器
     if prefs.use_auto_reload_timer:
-        elapsed = (time.perf_counter() - start_time) * 1000  # 运行耗时(毫秒)
-        bpy.context.scene.text_manager_prefs.auto_reload_use_time = elapsed
-        auto_reload_flag = not auto_reload_flag
+        _auto_reload_state["time"] = (time.perf_counter() - start_time) * 1000  # 运行耗时(毫秒)
+        _auto_reload_state["flag"] = not _auto_reload_state["flag"]
         # print(f"自动重载定时器回调，耗时 {elapsed:.3f} 毫秒")
         return prefs.auto_reload_timer_interval
     else:
         return None
 
 
+# NOTE 文件的 stat/哈希缓存, 以及 Text.filepath -> 绝对路径的缓存, 打开文件时清空
+_file_stats = FileStatCache()
+_abspath_cache = {}
+
+
+def resolve_text_filepath(filepath):
+    path = _abspath_cache.get(filepath)
+    if path is None:
+        path = _abspath_cache[filepath] = bpy.path.abspath(filepath)
+    return path
+
+
 def reload_text_block(text: bpy.types.Text):
-    """用文件内容替换 Text block,同时重置 is_modified"""
+    """文件内容变化时用文件内容替换 Text block, 返回是否重载"""
     if not text.filepath:
         # print(f"{text.name} 没有关联文件，跳过")
-        return
-
-    filepath = bpy.path.abspath(text.filepath)
-    if not os.path.exists(filepath):
-        # print(f"文件不存在: {filepath}")
-        return
+        return False
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        file_content = f.read()
+    # 缓存中还没有该文件时(加载后或清空缓存后)以磁盘内容为基准, 不覆盖 Text 中未保存的修改
+    file_content = _file_stats.read_if_changed(resolve_text_filepath(text.filepath), lambda: text.is_modified)
+    if file_content is None:
+        return False
     # 清空并写入新内容
     text.clear()
     text.write(file_content)
+    invalidate_code_cache(text.name)
+    return True
+
+
+# NOTE inotify 监听线程, 以及规范化的文件路径 -> 使用该文件的 text 名称
+_file_watcher = InotifyWatcher()
+_watched_texts = {}
+FILE_WATCH_INTERVAL = 0.02
+
+
+def sync_file_watches(prefs):
+    _watched_texts.clear()
+    for item in prefs.text_manager_collection:
+        text = item.text_pointer
+        if text is None or not item.auto_reload or not text.filepath:
+            continue
+        _watched_texts.setdefault(os.path.normpath(resolve_text_filepath(text.filepath)), []).append(text.name)
+    _file_watcher.set_directories({os.path.dirname(path) for path in _watched_texts})
+
+
+def file_watch_timer():
+    """在主线程重载监听线程报告变化的文件"""
+    start_time = time.perf_counter()
+    reloaded = 0
+    for path in _file_watcher.drain():
+        for name in _watched_texts.get(os.path.normpath(path), ()):
+            text = bpy.data.texts.get(name)
+            if text is not None and reload_text_block(text):
+                reloaded += 1
+    if reloaded and _trace["recorder"] is not None:
+        _trace["recorder"].record("file_watch", "TIMER", start_time, time.perf_counter(), {"reloaded": reloaded})
+    return FILE_WATCH_INTERVAL if _file_watcher.running else None
+
+
+def update_file_watcher(prefs):
+    """自动重载定时器运行且启用了文件监听时启动监听线程, 不支持 inotify 时继续使用轮询"""
+    wanted = prefs.use_auto_reload_timer and prefs.use_file_watcher and bpy.app.timers.is_registered(auto_reload_timer_callback)
+    if wanted and not _file_watcher.running:
+        if not _file_watcher.available:
+            print(_("File watcher is not available on this platform, using polling"))
+            return
+        try:
+            _file_watcher.start()
+        except OSError as e:
+            print(f"ScriptManager: Cannot start file watcher, using polling: {e}")
+            return
+        sync_file_watches(prefs)
+        if not bpy.app.timers.is_registered(file_watch_timer):
+            bpy.app.timers.register(file_watch_timer, first_interval=FILE_WATCH_INTERVAL)
+        print(_("File watcher started"))
+    elif not wanted and _file_watcher.running:
+        _file_watcher.stop()
+        _watched_texts.clear()
+        if bpy.app.timers.is_registered(file_watch_timer):
+            bpy.app.timers.unregister(file_watch_timer)
+        print(_("File watcher stopped"))
+
+
+def use_file_watcher_update(self, context):
+    update_file_watcher(self)
+
+
+def use_tracing_update(self, context):
+    if self.use_tracing:
+        _trace["recorder"] = TraceRecorder(self.trace_buffer_size)
+    else:
+        _trace["recorder"] = None
 
 
 # 布尔属性更新回调
@@ -735,48 +1701,658 @@ def use_auto_reload_update(self, context):
             print(_("Auto-reload timer stopped"))
         else:
             print(_("Auto-reload timer not started"))
+    update_file_watcher(prefs)
+
+
+# NOTE 条目运行时状态: 保存在 Python 中而不是 RNA 属性, 回调里写场景数据会引起新的 depsgraph 更新
+class ItemRuntime:
+    def __init__(self):
+        self.flag = False  # 每次运行翻转, 用于界面闪烁指示
+        self.trigger_flags = {}
+        self.run_times = {}  # 触发类型 -> 上次运行耗时(毫秒)
+        self.timings = {}  # 触发类型 -> 运行耗时的环形缓冲区
+        self.own_updates = {}  # 触发类型 -> 本次运行修改的数据还要经过的事件循环次数, 期间到达的更新视为自身引起的
+        self.chain = 0  # 连续被判定为自身引起的触发次数
+        self.suppressed = 0
+        self.status = "OK"  # OK / WARNING / THROTTLED / SUSPENDED
+        self.status_message = ""
+        self.recent = {}  # 触发类型 -> 预算检查用的最近运行耗时
+        self.over_budget_runs = {}  # 触发类型 -> 连续超出预算的次数
+        self.throttle_counter = 0
+        self.probe_interval = 0  # 降频后再次以原频率试运行前需要的降频运行次数, 试运行失败后加倍
+        self.runs_until_probe = 0
+        self.probing = False  # 正在以原频率试运行一个窗口
+        self.profile = None  # ProfileCapture, 接下来 N 次运行使用 cProfile
+        self.line_profile = None  # LineProfileCapture, 接下来 N 次运行记录每行耗时
+        self.offload_future = None  # 进程池中最近一次提交的任务
+        self.offload_applied = None  # 已应用结果的任务
+        self.offload_apply = None
+        self.offload_trigger = None  # 最近一次提交的任务的触发类型
+        self.offload_result = None
+        self.has_offload_result = False
+        self.input_fingerprint = None  # 上一次成功运行时的 (脚本内容哈希, 声明的输入的值)
+        self.skipped = 0  # 输入未变化而跳过的次数
+
+
+# 状态对应的图标
+RUNTIME_STATUS_ICONS = {
+    "WARNING": "ERROR",
+    "THROTTLED": "SORTTIME",
+    "SUSPENDED": "CANCEL",
+}
+
+# 每个条目每种触发类型保留的耗时样本数
+TIMING_BUFFER_SIZE = 256
+
+_item_runtime = {}
+# NOTE 时间线追踪, 开启后记录每次调度的开始/结束
+_trace = {"recorder": None}
+# 重入保护: 正在执行的条目
+_dispatch_guard = {"running": None}
+# 脚本写入数据后, depsgraph/msgbus 的通知在之后的事件循环中才到达. 运行结束时给条目打上标记,
+# 由定时器在经过 OWN_UPDATE_PASSES 次事件循环后清除: 定时器先于通知处理执行, 需要多保留一次
+OWN_UPDATE_PASSES = 2
+_ui_redraw_state = {"last": 0.0}
+
+
+def text_item_key(text_name):
+    return ("TEXT", text_name)
+
+
+def get_item_runtime(key):
+    runtime = _item_runtime.get(key)
+    if runtime is None:
+        runtime = _item_runtime[key] = ItemRuntime()
+    return runtime
+
+
+def parse_item_key(kind, name):
+    """还原通过操作符字符串属性传递的条目键"""
+    return (kind, name)
+
+
+def reset_item_runtime(key):
+    """重新启用条目时清除挂起状态和计数"""
+    _item_runtime.pop(key, None)
+    reset_debounce_state(key)
+
+
+def tag_ui_redraw(interval=0.1):
+    """状态不再写入 RNA, 需要手动刷新侧边栏, 限制刷新频率"""
+    now = time.perf_counter()
+    if now - _ui_redraw_state["last"] < interval:
+        return
+    _ui_redraw_state["last"] = now
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                for region in area.regions:
+                    if region.type == "UI":
+                        region.tag_redraw()
+
+
+def over_time_budget(recent, budget):
+    return len(recent) == recent.maxlen and sum(recent) / len(recent) > budget
+
+
+def own_update_timer():
+    """每次事件循环减少一次自身更新标记的剩余次数, 没有标记时停止"""
+    active = False
+    for runtime in _item_runtime.values():
+        for trigger, passes in list(runtime.own_updates.items()):
+            if passes <= 1:
+                del runtime.own_updates[trigger]
+            else:
+                runtime.own_updates[trigger] = passes - 1
+                active = True
+    return 0.0 if active else None
+
+
+def mark_own_update(runtime, trigger):
+    runtime.own_updates[trigger] = OWN_UPDATE_PASSES
+    if not bpy.app.timers.is_registered(own_update_timer):
+        bpy.app.timers.register(own_update_timer, first_interval=0.0)
+
+
+def check_time_budget(runtime, item, trigger, elapsed, window):
+    """按每种触发类型各自滚动窗口的平均耗时检查预算: 超出后降频执行, 或先警告, 持续超出一个窗口后挂起.
+    所有触发类型都回到预算内后才恢复. 降频不会缩短每次运行的耗时, 降频一段时间后以原频率试运行一个窗口,
+    平均耗时回到预算内时恢复, 否则继续降频并加倍下一次试运行前的间隔"""
+    recent = runtime.recent.get(trigger)
+    if recent is None or recent.maxlen != window:
+        recent = runtime.recent[trigger] = collections.deque(recent or (), maxlen=window)
+    recent.append(elapsed)
+    if runtime.status == "THROTTLED" and not runtime.probing:
+        runtime.runs_until_probe -= 1
+        if runtime.runs_until_probe <= 0:
+            # 试运行只用试运行期间的耗时判断
+            runtime.probing = True
+            runtime.recent.clear()
+            return
+    if len(recent) < recent.maxlen:
+        return
+    mean = sum(recent) / len(recent)
+    if mean <= item.time_budget:
+        runtime.over_budget_runs[trigger] = 0
+        if runtime.status in ("WARNING", "THROTTLED") and not any(over_time_budget(other, item.time_budget) for other in runtime.recent.values()):
+            runtime.status = "OK"
+            runtime.status_message = ""
+            runtime.probing = False
+            runtime.probe_interval = 0
+        return
+    over_budget_runs = runtime.over_budget_runs[trigger] = runtime.over_budget_runs.get(trigger, 0) + 1
+    if item.budget_action == "THROTTLE":
+        if runtime.status != "THROTTLED" or runtime.probing:
+            runtime.probe_interval = min(max(window, runtime.probe_interval * 2), window * 16)
+            runtime.runs_until_probe = runtime.probe_interval
+            runtime.probing = False
+        runtime.status = "THROTTLED"
+        runtime.status_message = _f("Throttled: {mean:.2f}ms > {budget:.2f}ms, running every {num} triggers", mean=mean, budget=item.time_budget, num=item.throttle_step)
+    elif over_budget_runs > window:
+        runtime.status = "SUSPENDED"
+        runtime.status_message = _f("Suspended: {mean:.2f}ms > {budget:.2f}ms budget", mean=mean, budget=item.time_budget)
+        print(f"ScriptManager: '{item.text_pointer.name}' exceeded its time budget, suspended")
+    else:
+        runtime.status = "WARNING"
+        runtime.status_message = _f("Over budget: {mean:.2f}ms > {budget:.2f}ms", mean=mean, budget=item.time_budget)
+
+
+def execute_dispatch(key, trigger, text, *args, item=None, batch=None):
+    """调度路径统一入口: 带重入保护、反馈循环检测和时间预算地执行脚本, 返回是否执行.
+    item 为 ScriptManagerItem 时使用其时间预算和执行模式设置, batch 为所在的 DispatchBatch"""
+    runtime = get_item_runtime(key)
+    if runtime.status == "SUSPENDED":
+        return False
+    if runtime.status == "THROTTLED" and not runtime.probing:
+        runtime.throttle_counter += 1
+        if runtime.throttle_counter % item.throttle_step:
+            return False
+    # 脚本执行期间同步触发的回调(如 frame_set, view_layer.update)直接丢弃
+    if _dispatch_guard["running"] is not None:
+        runtime.suppressed += 1
+        return False
+    prefs = batch.prefs if batch is not None else bpy.context.scene.text_manager_prefs
+    start_time = time.perf_counter()  # 记录开始时间
+    if trigger in ("DEPSGRAPH", "MSGBUS"):
+        # 该条目上一次运行的标记还在时, 这次更新视为脚本自身修改数据引起的, 其他条目的运行不算.
+        # 连续自身引起的运行次数达到上限时判定为反馈循环
+        if runtime.own_updates.pop(trigger, None) is not None:
+            runtime.chain += 1
+            if runtime.chain >= prefs.feedback_loop_count:
+                runtime.status = "SUSPENDED"
+                runtime.status_message = _f("Feedback loop: triggered itself {num} times in a row", num=runtime.chain)
+                print(f"ScriptManager: Feedback loop detected in '{text.name}' ({trigger}), suspended")
+                tag_ui_redraw(0.0)
+                return False
+            if prefs.suppress_self_updates:
+                runtime.suppressed += 1
+                return False
+        else:
+            runtime.chain = 0
+    # 脚本内容和声明的输入都与上一次成功运行时相同则跳过
+    fingerprint = None
+    if item is not None and item.skip_unchanged_inputs:
+        digest, (inputs, _outputs) = get_declaration_entry(text)
+        if inputs:
+            values = get_input_fingerprint(inputs)
+            if values is not None:
+                fingerprint = (digest, values)
+                if fingerprint == runtime.input_fingerprint:
+                    runtime.skipped += 1
+                    return False
+    runner = run_text_block
+    if item is not None and item.execution_mode == "PROCESS":
+        runner = functools.partial(run_offloaded, key, item.pending_policy)
+    _dispatch_guard["running"] = key
+    ok = False
+    try:
+        if runtime.profile is not None and runtime.profile.remaining > 0:
+            ok, _msg = runtime.profile.run(runner, text, trigger, *args)
+        elif runtime.line_profile is not None and runtime.line_profile.remaining > 0:
+            ok, _msg = runtime.line_profile.run(get_compiled_code(text), runner, text, trigger, *args)
+        else:
+            ok, _msg = runner(text, trigger, *args)
+    finally:
+        # 只记录成功运行时的输入, 失败后下一次触发重新执行
+        runtime.input_fingerprint = fingerprint if ok else None
+        _dispatch_guard["running"] = None
+        end_time = time.perf_counter()
+        if trigger in ("DEPSGRAPH", "MSGBUS"):
+            mark_own_update(runtime, trigger)
+    recorder = batch.recorder if batch is not None else _trace["recorder"]
+    if recorder is not None:
+        recorder.record(text.name, trigger, start_time, end_time, {"item": f"{key[0]}:{key[1]}", "frame": batch.frame if batch is not None else bpy.context.scene.frame_current})
+    runtime.flag = not runtime.flag
+    runtime.trigger_flags[trigger] = not runtime.trigger_flags.get(trigger, False)
+    # 进程池模式的耗时在应用结果时按 compute 的耗时记录
+    if runner is run_text_block:
+        record_run_time(runtime, item, trigger, (end_time - start_time) * 1000, prefs.budget_window)
+    tag_ui_redraw()
+    return True
+
+
+def record_run_time(runtime, item, trigger, elapsed, window):
+    """记录一次运行的耗时(毫秒), 并按条目的时间预算检查"""
+    runtime.run_times[trigger] = elapsed
+    timings = runtime.timings.get(trigger)
+    if timings is None:
+        timings = runtime.timings[trigger] = RingBuffer(TIMING_BUFFER_SIZE)
+    timings.append(elapsed)
+    if item is not None and item.time_budget > 0:
+        check_time_budget(runtime, item, trigger, elapsed, window)
+
+
+def find_text_item(scene, text_name):
+    """通过调度索引查找使用该 text 的条目, 找不到时返回 None"""
+    index = get_dispatch_index(scene)["ITEMS"].get(text_name)
+    collection = scene.text_manager_prefs.text_manager_collection
+    if index is None or index >= len(collection):
+        return None
+    item = collection[index]
+    if item.text_pointer is None or item.text_pointer.name != text_name:
+        return None
+    return item
+
+
+# NOTE 每种触发类型最近若干批的总耗时(毫秒)
+_batch_timings = {}
+
+
+class DispatchBatch:
+    """一次触发中按顺序执行的所有脚本共用的上下文: 设置、记录器和帧号只读取一次, 整批计时一次.
+    只用于帧更新和 depsgraph 更新; msgbus 的每个订阅由 Blender 分别回调, 不参与排序"""
+
+    def __init__(self, trigger, scene):
+        self.trigger = trigger
+        self.prefs = scene.text_manager_prefs
+        self.recorder = _trace["recorder"]
+        self.frame = scene.frame_current
+        self.runs = 0
+        self.start = time.perf_counter()
+
+    def run(self, key, text, *args, item=None):
+        if execute_dispatch(key, self.trigger, text, *args, item=item, batch=self):
+            self.runs += 1
+
+    def finish(self, name):
+        end = time.perf_counter()
+        if self.runs:
+            timings = _batch_timings.get(self.trigger)
+            if timings is None:
+                timings = _batch_timings[self.trigger] = RingBuffer(TIMING_BUFFER_SIZE)
+            timings.append((end - self.start) * 1000)
+        if self.recorder is not None:
+            self.recorder.record(name, "DISPATCH", self.start, end, {"frame": self.frame, "runs": self.runs})
+
+
+# NOTE 调度索引: text 名称 -> 集合索引, 以及每种触发类型启用的 text 名称列表
+# 只在集合/text_pointer/开关变化时重建, 每次触发只遍历启用的条目
+_dispatch_index = {"ITEMS": {}, "FRAME": [], "DEPSGRAPH": []}
+_dispatch_index_state = {"dirty": True, "scene": None}
+
+# 触发类型对应条目上的开关
+DISPATCH_FLAGS = {
+    "FRAME": "run_in_frame_update",
+    "DEPSGRAPH": "run_in_desgaph_update",
+}
+
+
+def mark_dispatch_index_dirty():
+    _dispatch_index_state["dirty"] = True
+
+
+# NOTE 脚本在模块顶层用字面量声明输入输出, 例如
+#     INPUTS = ['bpy.data.objects["Cube"].location']
+#     OUTPUTS = ['bpy.data.objects["Target"].location']
+# 静态解析, 不执行脚本. text 名称 -> (源码, (inputs, outputs))
+_declaration_cache = {}
+
+
+def parse_declarations(source):
+    declarations = {"INPUTS": (), "OUTPUTS": ()}
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return (), ()
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+            continue
+        name = node.targets[0].id
+        if name not in declarations:
+            continue
+        try:
+            value = ast.literal_eval(node.value)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            value = None
+        if isinstance(value, str):
+            value = (value,)
+        if not isinstance(value, (list, tuple)) or not all(isinstance(path, str) for path in value):
+            print(f"ScriptManager: {name} must be a literal list of RNA paths, ignored")
+            continue
+        declarations[name] = tuple(value)
+    return declarations["INPUTS"], declarations["OUTPUTS"]
+
+
+def get_declaration_entry(text: bpy.types.Text):
+    """返回 (当前内容的哈希, (INPUTS, OUTPUTS)), 按 text 当前内容的哈希缓存, 不依赖脚本是否已重新编译"""
+    source = text.as_string()
+    digest = hashlib.md5(source.encode("utf-8")).hexdigest()
+    entry = _declaration_cache.get(text.name)
+    if entry is None or entry[0] != digest:
+        declarations = parse_declarations(source)
+        if entry is not None and entry[1] != declarations:
+            # 声明的输入输出改变后重新排序
+            mark_dispatch_index_dirty()
+        entry = _declaration_cache[text.name] = (digest, declarations)
+    return entry
+
+
+def get_script_declarations(text: bpy.types.Text):
+    """返回脚本声明的 (INPUTS, OUTPUTS)"""
+    return get_declaration_entry(text)[1]
+
+
+def paths_overlap(a, b):
+    """两个 RNA 路径指向同一数据或其中一个包含另一个"""
+    if a == b:
+        return True
+    short, long = (a, b) if len(a) < len(b) else (b, a)
+    return long.startswith(short) and long[len(short)] in ".["
+
+
+def order_by_dependencies(names, texts, priorities=None):
+    """按输出->输入的依赖关系对脚本做拓扑排序, 满足依赖的脚本中优先级高的先执行, 相同时保持原顺序;
+    存在环时环上的脚本按原顺序放在最后"""
+    declarations = {name: get_script_declarations(texts[name]) for name in names}
+    upstream = {name: set() for name in names}
+    for producer in names:
+        outputs = declarations[producer][1]
+        if not outputs:
+            continue
+        for consumer in names:
+            if consumer != producer and any(paths_overlap(output, path) for output in outputs for path in declarations[consumer][0]):
+                upstream[consumer].add(producer)
+    priorities = priorities or {}
+    # 优先级高的在前, 相同时按列表顺序, sorted 是稳定的
+    candidates = sorted(names, key=lambda name: -priorities.get(name, 0))
+    ordered = []
+    done = set()
+    while len(ordered) < len(names):
+        ready = next((name for name in candidates if name not in done and upstream[name] <= done), None)
+        if ready is None:
+            cycle = [name for name in candidates if name not in done]
+            print(f"ScriptManager: Dependency cycle between {', '.join(cycle)}, running them by priority and list order")
+            ordered.extend(cycle)
+            break
+        # 每轮只取一个, 保证结果稳定
+        ordered.append(ready)
+        done.add(ready)
+    return ordered
+
+
+def value_fingerprint(value):
+    """把输入的值转换为可比较的元组, 无法比较的值(数据块等)返回 None"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "bl_rna") or not hasattr(value, "__len__"):
+        return None
+    items = tuple(value_fingerprint(v) for v in value)
+    return None if None in items else items
+
+
+def get_input_fingerprint(inputs):
+    """返回所有输入的值, 任一输入无法解析或比较时返回 None, 表示总是执行"""
+    values = []
+    for path in inputs:
+        try:
+            fingerprint = value_fingerprint(get_preview_resolver(path).value())
+        except Exception:
+            return None
+        if fingerprint is None:
+            return None
+        values.append(fingerprint)
+    return tuple(values)
+
+
+def get_dispatch_index(scene):
+    """返回调度索引, 标记为脏或场景变化时重建"""
+    if _dispatch_index_state["dirty"] or _dispatch_index_state["scene"] != scene.name:
+        items, frame, deps, texts, priorities = {}, [], [], {}, {}
+        for i, item in enumerate(scene.text_manager_prefs.text_manager_collection):
+            if item.text_pointer is None:
+                continue
+            name = item.text_pointer.name
+            items[name] = i
+            texts[name] = item.text_pointer
+            priorities[name] = item.priority
+            if item.run_in_frame_update:
+                frame.append(name)
+            if item.run_in_desgaph_update:
+                deps.append(name)
+        _dispatch_index["ITEMS"] = items
+        _dispatch_index["FRAME"] = order_by_dependencies(frame, texts, priorities)
+        _dispatch_index["DEPSGRAPH"] = order_by_dependencies(deps, texts, priorities)
+        _dispatch_index_state["dirty"] = False
+        _dispatch_index_state["scene"] = scene.name
+    return _dispatch_index
+
+
+def iter_dispatch_items(scene, trigger):
+    """按依赖顺序返回该触发类型下启用的条目, 发现索引过期时标记重建并跳过"""
+    index = get_dispatch_index(scene)
+    collection = scene.text_manager_prefs.text_manager_collection
+    flag = DISPATCH_FLAGS[trigger]
+    for name in index[trigger]:
+        try:
+            item = collection[index["ITEMS"][name]]
+        except (KeyError, IndexError):
+            mark_dispatch_index_dirty()
+            continue
+        if item.text_pointer is None or item.text_pointer.name != name or not getattr(item, flag):
+            mark_dispatch_index_dirty()
+            continue
+        yield item
+
+
+def is_script_manager_handler(handler):
+    return hasattr(handler, "_ScriptManager_dispatch") or hasattr(handler, "_ScriptManagerItem_FC_ID") or hasattr(handler, "_ScriptManagerItem_DC_ID")
+
+
+def sync_dispatch_handlers(scene):
+    """重建调度索引, 有启用条目时安装调度器, 否则移除. 返回 (帧更新数量, 依赖图更新数量)"""
+    mark_dispatch_index_dirty()
+    index = get_dispatch_index(scene)
+    for handlers, handler, names in (
+        (bpy.app.handlers.frame_change_pre, ScriptManager_frame_update_handler, index["FRAME"]),
+        (bpy.app.handlers.depsgraph_update_post, ScriptManager_depsgraph_update_handler, index["DEPSGRAPH"]),
+    ):
+        # 移除旧版本按条目注册的闭包
+        for old_handler in list(handlers):
+            if is_script_manager_handler(old_handler) and old_handler is not handler:
+                handlers.remove(old_handler)
+        if names and handler not in handlers:
+            handlers.append(handler)
+        elif not names and handler in handlers:
+            handlers.remove(handler)
+    return len(index["FRAME"]), len(index["DEPSGRAPH"])
 
 
 # NOTE 帧更新回调
-def make_ScriptManager_frame_update_handler(item_name):
-    def ScriptManager_frame_update_handler(scene):
-        start_time = time.perf_counter()  # 记录开始时间
-        prefs = scene.text_manager_prefs
-        item = None
-        for temp in prefs.text_manager_collection:
-            if temp.run_in_frame_update and temp.text_pointer and temp.text_pointer.name == ScriptManager_frame_update_handler._ScriptManagerItem_FC_ID:
-                item = temp
-        if item:
-            DebugPrint("Frame update:", ScriptManager_frame_update_handler._ScriptManagerItem_FC_ID)
-            run_text_block(item.text_pointer)
-            item.frame_update_flag = not item.frame_update_flag
-            item.updata_flag = not item.updata_flag
-            elapsed = (time.perf_counter() - start_time) * 1000  # 运行耗时(毫秒)
-            item.frame_update_run_time = elapsed
-
-    ScriptManager_frame_update_handler._ScriptManagerItem_FC_ID = item_name
-    return ScriptManager_frame_update_handler
+def ScriptManager_frame_update_handler(scene, depsgraph=None):
+    batch = DispatchBatch("FRAME", scene)
+    for item in iter_dispatch_items(scene, "FRAME"):
+        DebugPrint("Frame update:", item.text_pointer.name)
+        batch.run(text_item_key(item.text_pointer.name), item.text_pointer, scene, item=item)
+    batch.finish("frame_change_pre")
+
+
+ScriptManager_frame_update_handler._ScriptManager_dispatch = "FRAME"
+
+
+# NOTE depsgraph 过滤: 名称模式字符串 -> 编译后的正则
+_name_filter_cache = {}
+
+
+def get_name_filter(patterns: str):
+    """把逗号分隔的通配符模式编译为正则, 为空时返回 None"""
+    if patterns not in _name_filter_cache:
+        parts = [p.strip() for p in patterns.split(",") if p.strip()]
+        _name_filter_cache[patterns] = re.compile("|".join(fnmatch.translate(p) for p in parts)) if parts else None
+    return _name_filter_cache[patterns]
+
+
+def collect_depsgraph_updates(depsgraph):
+    """把 depsgraph.updates 转换为 (ID 类型, 名称, 几何, 变换, 着色) 元组列表"""
+    updates = []
+    for update in depsgraph.updates:
+        id_data = update.id
+        updates.append((id_data.id_type, id_data.name, update.is_updated_geometry, update.is_updated_transform, update.is_updated_shading))
+    return updates
+
+
+def match_depsgraph_filter(item, updates):
+    """只要有一条更新同时满足类型、名称和更新种类的过滤条件就返回 True, 未设置的条件视为全部匹配"""
+    id_types = item.depsgraph_filter_id_types
+    pattern = get_name_filter(item.depsgraph_filter_names)
+    kinds = (item.depsgraph_filter_geometry, item.depsgraph_filter_transform, item.depsgraph_filter_shading)
+    any_kind = not any(kinds)
+    for id_type, name, geometry, transform, shading in updates:
+        if id_types and id_type not in id_types:
+            continue
+        if pattern is not None and not pattern.match(name):
+            continue
+        if any_kind or (kinds[0] and geometry) or (kinds[1] and transform) or (kinds[2] and shading):
+            return True
+    return False
+
+
+# NOTE 防抖/合并: 触发键 -> DebounceState, 连续触发合并为一次由定时器延迟执行
+class DebounceState:
+    __slots__ = ("last_run", "deadline", "pending", "coalesced")
+
+    def __init__(self):
+        self.last_run = float("-inf")  # LEADING 上一次立即执行的时间
+        self.deadline = 0.0
+        self.pending = None
+        self.coalesced = 0
+
+
+_debounce_states = {}
+_debounce_timer = {"next": None}
+
+
+def debounce_trigger(key, interval_ms, edge, run):
+    """按防抖设置调度 run. LEADING 立即执行, 之后 interval_ms 内的触发丢弃(按上一次执行计时, 持续触发时也会定期执行),
+    TRAILING 在最后一次触发后安静 interval_ms 再执行一次. 返回是否已立即执行"""
+    now = time.perf_counter()
+    interval = interval_ms / 1000
+    state = _debounce_states.get(key)
+    if state is None:
+        state = _debounce_states[key] = DebounceState()
+    if edge == "LEADING":
+        if now - state.last_run >= interval:
+            state.last_run = now
+            run()
+            return True
+        state.coalesced += 1
+        return False
+    if state.pending is not None:
+        state.coalesced += 1
+    state.pending = run
+    state.deadline = now + interval
+    schedule_debounce_timer(state.deadline)
+    return False
+
+
+def schedule_debounce_timer(deadline):
+    scheduled = _debounce_timer["next"]
+    if bpy.app.timers.is_registered(debounce_timer_callback):
+        if scheduled is not None and scheduled <= deadline:
+            return
+        bpy.app.timers.unregister(debounce_timer_callback)
+    _debounce_timer["next"] = deadline
+    bpy.app.timers.register(debounce_timer_callback, first_interval=max(0.0, deadline - time.perf_counter()))
+
+
+def debounce_timer_callback():
+    """执行所有到期的延迟触发, 返回距离下一个到期的时间"""
+    now = time.perf_counter()
+    next_deadline = None
+    for state in list(_debounce_states.values()):
+        if state.pending is None:
+            continue
+        if state.deadline <= now:
+            run, state.pending = state.pending, None
+            try:
+                run()
+            except Exception as e:
+                print(f"ScriptManager: Deferred run failed: {e}")
+        elif next_deadline is None or state.deadline < next_deadline:
+            next_deadline = state.deadline
+    _debounce_timer["next"] = next_deadline
+    if next_deadline is None:
+        return None
+    return max(0.0, next_deadline - time.perf_counter())
+
+
+def get_coalesced_count(key):
+    state = _debounce_states.get(key)
+    return state.coalesced if state else 0
+
+
+def reset_debounce_state(key):
+    _debounce_states.pop(key, None)
+
+
+def run_depsgraph_item(item, scene, depsgraph, batch=None):
+    DebugPrint("Depsgraph update:", item.text_pointer.name)
+    if batch is not None:
+        batch.run(text_item_key(item.text_pointer.name), item.text_pointer, scene, depsgraph, item=item)
+    else:
+        execute_dispatch(text_item_key(item.text_pointer.name), "DEPSGRAPH", item.text_pointer, scene, depsgraph, item=item)
+
+
+def run_deferred_depsgraph_item(scene_name, text_name):
+    """定时器中执行被合并的 depsgraph 触发, 此时原 depsgraph 已失效, 重新获取当前的依赖图"""
+    scene = bpy.data.scenes.get(scene_name)
+    if scene is None:
+        return
+    for item in iter_dispatch_items(scene, "DEPSGRAPH"):
+        if item.text_pointer.name == text_name:
+            run_depsgraph_item(item, scene, bpy.context.evaluated_depsgraph_get())
+            break
 
 
 # NOTE depsgraph 更新回调
-def make_ScriptManager_depsgraph_update_handler(item_name):
-    def ScriptManager_depsgraph_update_handler(scene):
-        start_time = time.perf_counter()  # 记录开始时间
-        prefs = scene.text_manager_prefs
-        item = None
-        for temp in prefs.text_manager_collection:
-            if temp.run_in_desgaph_update and temp.text_pointer and temp.text_pointer.name == ScriptManager_depsgraph_update_handler._ScriptManagerItem_DC_ID:
-                item = temp
-        if item:
-            DebugPrint("Depsgraph update:", ScriptManager_depsgraph_update_handler._ScriptManagerItem_DC_ID)
-            run_text_block(item.text_pointer)
-            item.desgaph_updata_flag = not item.desgaph_updata_flag
-            item.updata_flag = not item.updata_flag
-            elapsed = (time.perf_counter() - start_time) * 1000  # 运行耗时(毫秒)
-            item.desgaph_update_run_time = elapsed
-
-    ScriptManager_depsgraph_update_handler._ScriptManagerItem_DC_ID = item_name
-    return ScriptManager_depsgraph_update_handler
+def ScriptManager_depsgraph_update_handler(scene, depsgraph=None):
+    batch = DispatchBatch("DEPSGRAPH", scene)
+    updates = None
+    for item in iter_dispatch_items(scene, "DEPSGRAPH"):
+        if item.use_depsgraph_filter and depsgraph is not None:
+            # 同一次更新只收集一次, 所有条目共用
+            if updates is None:
+                updates = collect_depsgraph_updates(depsgraph)
+            if not match_depsgraph_filter(item, updates):
+                continue
+        if item.use_debounce:
+            text_name = item.text_pointer.name
+            if item.debounce_edge == "LEADING":
+                run = functools.partial(run_depsgraph_item, item, scene, depsgraph, batch)
+            else:
+                run = functools.partial(run_deferred_depsgraph_item, scene.name, text_name)
+            debounce_trigger(("DEPSGRAPH", text_name), item.debounce_interval, item.debounce_edge, run)
+        else:
+            run_depsgraph_item(item, scene, depsgraph, batch)
+    batch.finish("depsgraph_update_post")
+
+
+ScriptManager_depsgraph_update_handler._ScriptManager_dispatch = "DEPSGRAPH"
+
+
+@bpy.app.handlers.persistent
+def ScriptManager_undo_post_handler(scene, *args):
+    # 撤销/重做不会触发属性的 update 回调, 需要重建索引
+    mark_dispatch_index_dirty()
 
 
 # NOTE 切换文本编辑器为激活文本
@@ -792,16 +2368,22 @@ def update_script_manager_index(self, context):
     if text is None:
         return
 
+    area, space = find_text_editor_space()
+    if space is not None:
+        # 切换当前文本
+        space.text = text
+
+
+def find_text_editor_space():
+    """返回第一个 Text Editor 的 (area, space), 没有时返回 (None, None)"""
     # 遍历所有窗口和区域，寻找 Text Editor
     for window in bpy.context.window_manager.windows:
         for area in window.screen.areas:
             if area.type == "TEXT_EDITOR":
                 for space in area.spaces:
                     if space.type == "TEXT_EDITOR":
-                        # 切换当前文本
-                        space.text = text
-                        break
-                break  # 只切一个文本编辑器
+                        return area, space
+    return None, None
 
 
 def get_rna_display_name(path_str: str):
@@ -841,18 +2423,136 @@ def update_item_remark(self, context):
 
 
 def update_registered_status(self, context):
-    msgbus_collection = context.scene.text_manager_prefs.msgbus_collection
-    index = -1
-    for i, item in enumerate(msgbus_collection):
-        if item == self:
-            index = i
-            break
-    if index == -1:
-        return
+    uid = ensure_msgbus_uid(self)
+    reset_item_runtime(("MSGBUS", uid))
     if self.is_registered:
-        bpy.ops.script_manager.msgbus_register_msgbus(index=index)
+        bpy.ops.script_manager.msgbus_register_msgbus(uid=uid)
+    else:
+        bpy.ops.script_manager.msgbus_unregister_msgbus(uid=uid)
+
+
+# NOTE msgbus 注册表: 条目使用固定的 uid, 排序或删除其他条目后回调仍然对应同一个条目
+# uid -> 订阅的 owner, 注销时按 owner 清除
+_msgbus_owners = {}
+# uid -> 列表中的索引, 查找时校验, 不一致时整体重建
+_msgbus_index = {}
+
+
+def ensure_msgbus_uid(item):
+    if not item.uid:
+        item.uid = uuid.uuid4().hex
+    return item.uid
+
+
+def find_msgbus_item(uid):
+    collection = bpy.context.scene.text_manager_prefs.msgbus_collection
+    index = _msgbus_index.get(uid)
+    if index is None or index >= len(collection) or collection[index].uid != uid:
+        _msgbus_index.clear()
+        _msgbus_index.update((item.uid, i) for i, item in enumerate(collection))
+        index = _msgbus_index.get(uid)
+        if index is None:
+            return None
+    return collection[index]
+
+
+def subscribe_msgbus_item(item):
+    """按条目的 RNA 路径或类型订阅, 已订阅时先注销, 返回是否成功"""
+    if item.subscription_mode == "TYPE":
+        valid_path, key = get_msgbus_type_key(item.type_name, item.type_property)
+    else:
+        valid_path, key = get_msgbus_key(item.RNA_path)
+    if not valid_path:
+        return False
+    uid = ensure_msgbus_uid(item)
+    unsubscribe_msgbus_item(uid)
+    owner = _msgbus_owners[uid] = object()
+    bpy.msgbus.subscribe_rna(key=key, owner=owner, args=(), notify=make_ScriptManagerMsgBus_update_callback(uid))
+    if item.subscription_mode == "TYPE":
+        # 订阅时的值作为第一次比较的基准
+        _msgbus_snapshots[uid] = take_type_snapshot(item)[1:]
+    return True
+
+
+def unsubscribe_msgbus_item(uid=None):
+    """注销指定条目的订阅, 不指定时注销全部"""
+    uids = list(_msgbus_owners) if uid is None else [uid]
+    for uid in uids:
+        owner = _msgbus_owners.pop(uid, None)
+        _msgbus_snapshots.pop(uid, None)
+        if owner is not None:
+            bpy.msgbus.clear_by_owner(owner)
+
+
+def msgbus_item_target(item):
+    """条目监听的目标, 用于显示和检查是否已填写"""
+    if item.subscription_mode == "TYPE":
+        return f"{item.type_name}.{item.type_property}" if item.type_name and item.type_property else ""
+    return item.RNA_path
+
+
+# NOTE 按类型订阅: 一次订阅类型的某个属性, 通知时与上一次的快照比较找出变化的数据块
+# uid -> (名称列表, 值数组或列表)
+_msgbus_snapshots = {}
+
+
+def get_type_collection(type_name):
+    """返回 bpy.data 中存放该类型数据块的集合, 非 ID 类型返回 None"""
+    for prop in bpy.data.bl_rna.properties:
+        if prop.type == "COLLECTION" and prop.fixed_type.identifier == type_name:
+            return getattr(bpy.data, prop.identifier)
+    return None
+
+
+def get_msgbus_type_key(type_name, prop_name):
+    rna_type = getattr(bpy.types, type_name, None)
+    if rna_type is None or prop_name not in rna_type.bl_rna.properties or get_type_collection(type_name) is None:
+        return False, None
+    return True, (rna_type, prop_name)
+
+
+def take_type_snapshot(item):
+    """返回 (集合, 名称列表, 值); 数值属性用 foreach_get 读入数组, 其他属性逐个读取"""
+    collection = get_type_collection(item.type_name)
+    prop = getattr(bpy.types, item.type_name).bl_rna.properties[item.type_property]
+    names = collection.keys()
+    dtype = bulk.PROPERTY_DTYPES.get(prop.type)
+    if dtype is not None:
+        width = 1
+        for size in prop.array_dimensions:
+            width *= size or 1
+        values = bulk.snapshot(collection, item.type_property, width, dtype)
+    else:
+        values = [getattr(data, item.type_property) for data in collection]
+    return collection, names, values
+
+
+def diff_type_snapshot(uid, item):
+    """返回自上一次快照以来属性值变化(或新增)的数据块, 类型或属性无效时返回空列表"""
+    if not get_msgbus_type_key(item.type_name, item.type_property)[0]:
+        return []
+    collection, names, values = take_type_snapshot(item)
+    previous = _msgbus_snapshots.get(uid)
+    _msgbus_snapshots[uid] = (names, values)
+    if previous is None:
+        return list(collection)
+    previous_names, previous_values = previous
+    if isinstance(values, list):
+        previous_map = dict(zip(previous_names, previous_values))
+        changed = [i for i, name in enumerate(names) if name not in previous_map or previous_map[name] != values[i]]
+    elif previous_names == names:
+        changed = bulk.changed_rows(previous_values, values).tolist()
     else:
-        bpy.ops.script_manager.msgbus_unregister_msgbus(RNA_path=self.RNA_path)
+        # 数据块增删或改名后按名称比较
+        previous_index = {name: i for i, name in enumerate(previous_names)}
+        changed = [i for i, name in enumerate(names) if name not in previous_index or (previous_values[previous_index[name]] != values[i]).any()]
+    return [collection[i] for i in changed]
+
+
+MSGBUS_SUBSCRIPTION_ITEMS = [
+    ("PATH", "Path", "Watch one property given by its RNA path"),
+    ("TYPE", "Type", "Subscribe once to a property of every datablock of a type, the script receives the changed datablocks"),
+]
 
 
 class ScriptManagerMsgBusItem(bpy.types.PropertyGroup):
@@ -860,8 +2560,13 @@ class ScriptManagerMsgBusItem(bpy.types.PropertyGroup):
     RNA_path: StringProperty(name="RNA Path", default="", update=update_item_remark)
     text_pointer: PointerProperty(type=bpy.types.Text)
     is_registered: BoolProperty(name="Is Registered", default=False, update=update_registered_status)
-    update_flag: BoolProperty(name="flag", default=False)
-    msgbus_run_time: FloatProperty(name="Run Time", default=0.0)
+    subscription_mode: EnumProperty(name="Subscription", items=MSGBUS_SUBSCRIPTION_ITEMS, default="PATH")
+    type_name: StringProperty(name="Type", description="RNA type whose datablocks are watched, e.g. Object", default="Object")
+    type_property: StringProperty(name="Property", description="Property watched on every datablock of the type, e.g. location", default="location")
+    uid: StringProperty(name="UID", description="Stable identifier used by the msgbus registry", default="")
+    use_debounce: BoolProperty(name="Debounce", description="Collapse bursts of triggers into a single run", default=False)
+    debounce_interval: FloatProperty(name="Min Interval (ms)", default=100.0, min=0.0)
+    debounce_edge: EnumProperty(name="Edge", items=DEBOUNCE_EDGE_ITEMS, default="TRAILING")
 
 
 class SCRIPTMANAGER_UL_MsgBus(bpy.types.UIList):
@@ -871,7 +2576,14 @@ class SCRIPTMANAGER_UL_MsgBus(bpy.types.UIList):
         row.label(text=f"{index}.")
         row.alignment = "EXPAND"
         row.prop(item, "Remarks", text="", icon="BOOKMARKS")
-        row.prop(item, "RNA_path", text="")
+        if item.subscription_mode == "TYPE":
+            # 订阅在注册时确定, 注册期间修改类型或属性不会生效
+            subrow = row.row(align=True)
+            subrow.enabled = not item.is_registered
+            subrow.prop(item, "type_name", text="")
+            subrow.prop(item, "type_property", text="")
+        else:
+            row.prop(item, "RNA_path", text="")
         row.prop(item, "text_pointer", text="")
         # op = row.operator("script_manager.msgbus_register_msgbus", icon="PLUS", text="")
         # op.index = index
@@ -879,9 +2591,11 @@ class SCRIPTMANAGER_UL_MsgBus(bpy.types.UIList):
         # op1.RNA_path = item.RNA_path
         # row.prop(item, "is_registered", text="", icon="HIDE_OFF" if item.is_registered else "HIDE_ON")
         subrow = row.row(align=True)  # 创建子布局
-        subrow.enabled = item.RNA_path != "" and item.text_pointer != None  # 禁用交互(灰化)
+        subrow.enabled = msgbus_item_target(item) != "" and item.text_pointer != None  # 禁用交互(灰化)
         subrow.prop(item, "is_registered", text="", icon="RECORD_ON" if item.is_registered else "RECORD_OFF")
-        row.label(text=f"{item.msgbus_run_time:.2f}ms", icon="TIME")
+        runtime = get_item_runtime(("MSGBUS", item.uid))
+        row.alert = runtime.status == "SUSPENDED"
+        row.label(text=f"{runtime.run_times.get('MSGBUS', 0.0):.2f}ms", icon=RUNTIME_STATUS_ICONS.get(runtime.status, "TIME"))
 
 
 class ScriptManagerMsgBusPanel(bpy.types.Panel):
@@ -907,6 +2621,20 @@ class ScriptManagerMsgBusPanel(bpy.types.Panel):
         col1.separator()
         col1.operator("script_manager.msgbus_move_item_up", icon="TRIA_UP", text="")
         col1.operator("script_manager.msgbus_move_item_down", icon="TRIA_DOWN", text="")
+        prefs = context.scene.text_manager_prefs
+        if 0 <= prefs.msgbus_index < len(prefs.msgbus_collection):
+            box = col.box()
+            item = prefs.msgbus_collection[prefs.msgbus_index]
+            key = ("MSGBUS", item.uid)
+            row = box.row()
+            row.enabled = not item.is_registered
+            row.prop(item, "subscription_mode", expand=True)
+            draw_runtime_status(box, get_item_runtime(key), key)
+            draw_timing_stats(box, get_item_runtime(key), key)
+            draw_profile(box, get_item_runtime(key), key)
+            if item.text_pointer:
+                draw_line_profile(box, get_item_runtime(key), key, item.text_pointer)
+            draw_debounce_settings(box, item, key)
 
 
 class ScriptManagerMsgBus_OT_add_item(bpy.types.Operator):
@@ -916,6 +2644,7 @@ class ScriptManagerMsgBus_OT_add_item(bpy.types.Operator):
     def execute(self, context):
         prefs = context.scene.text_manager_prefs
         item = prefs.msgbus_collection.add()
+        item.uid = uuid.uuid4().hex
         item.RNA_path = "RNA Path"
         prefs.msgbus_index = len(prefs.msgbus_collection) - 1
         return {"FINISHED"}
@@ -933,6 +2662,10 @@ class ScriptManagerMsgBus_OT_remove_item(bpy.types.Operator):
             if prefs.msgbus_collection[idx].is_registered:
                 self.report({"ERROR"}, _("This item is not unregistered. Please unregister it before deleting."))
                 return {"CANCELLED"}
+            item = prefs.msgbus_collection[idx]
+            cancel_script_jobs(("MSGBUS", item.uid))
+            unsubscribe_msgbus_item(item.uid)
+            reset_item_runtime(("MSGBUS", item.uid))
             prefs.msgbus_collection.remove(idx)
             prefs.msgbus_index = max(0, idx - 1)
         return {"FINISHED"}
@@ -964,18 +2697,33 @@ class ScriptManagerMsgBus_OT_move_item_down(bpy.types.Operator):
         return {"FINISHED"}
 
 
-# NOTE 制作属性监听回调函数
-def make_ScriptManagerMsgBus_update_callback(index):
+def run_msgbus_item(uid):
+    item = find_msgbus_item(uid)
+    if item is None or item.text_pointer is None:
+        return
+    text = item.text_pointer
+    runtime = get_item_runtime(("MSGBUS", uid))
+    args = ()
+    if item.subscription_mode == "TYPE":
+        changed = diff_type_snapshot(uid, item)
+        if not changed:
+            return
+        args = (changed,)
+    # DebugPrint(f"{owner}属性更新了,执行{text_name}")
+    if execute_dispatch(("MSGBUS", uid), "MSGBUS", text, *args):
+        DebugPrint(f"Triggered property updated, executing {text.name}, took {runtime.run_times['MSGBUS']:.2f} ms")
+
+
+# NOTE 制作属性监听回调函数, 通过 uid 查找条目
+def make_ScriptManagerMsgBus_update_callback(uid):
     def ScriptManagerMsgBus_update_callback():
-        prefs = bpy.context.scene.text_manager_prefs
-        msgbus_collection = prefs.msgbus_collection
-        start_time = time.perf_counter()  # 记录开始时间
-        # DebugPrint(f"{owner}属性更新了,执行{text_name}")
-        run_text_block(bpy.data.texts[msgbus_collection[index].text_pointer.name])
-        msgbus_collection[index].update_flag = not msgbus_collection[index].update_flag
-        end_time = time.perf_counter()  # 记录结束时间
-        msgbus_collection[index].msgbus_run_time = (end_time - start_time) * 1000
-        DebugPrint(f"Triggered property updated, executing {msgbus_collection[index].text_pointer.name}, took {msgbus_collection[index].msgbus_run_time:.2f} ms")
+        item = find_msgbus_item(uid)
+        if item is None:
+            return
+        if item.use_debounce:
+            debounce_trigger(("MSGBUS", uid), item.debounce_interval, item.debounce_edge, functools.partial(run_msgbus_item, uid))
+        else:
+            run_msgbus_item(uid)
 
     return ScriptManagerMsgBus_update_callback
 
@@ -985,25 +2733,20 @@ class ScriptManagerMsgBus_OT_register_msgbus(bpy.types.Operator):
     bl_label = "Register MsgBus Handlers"
     bl_options = {"REGISTER", "UNDO"}  # 确保 REGISTER 以记录报告到状态栏
 
-    index: IntProperty(name="Index", default=0)
+    uid: StringProperty(name="UID")
 
     def execute(self, context):
-        pref = context.scene.text_manager_prefs
-        RNA_path = pref.msgbus_collection[self.index].RNA_path
-        text_name = pref.msgbus_collection[self.index].text_pointer.name if pref.msgbus_collection[self.index].text_pointer else ""
+        item = find_msgbus_item(self.uid)
+        if item is None:
+            self.report({"ERROR"}, f"Trigger not found: {self.uid}")
+            return {"CANCELLED"}
+        RNA_path = msgbus_item_target(item)
+        text_name = item.text_pointer.name if item.text_pointer else ""
         if RNA_path == "" or text_name == "":
             self.report({"ERROR"}, f"Path or script cannot be empty: {RNA_path} - {text_name}")
             return {"CANCELLED"}
-        valid_path, key = get_msgbus_key(RNA_path)
-        if RNA_path and valid_path and text_name != "":
-            self.report({"INFO"}, f"Register Trigger monitoring: {RNA_path} - {text_name}-key: {key}")
-
-            bpy.msgbus.subscribe_rna(
-                key=key,
-                owner=sys.intern(str(RNA_path).strip()),  # 保证注册时和注销时是完全一致的对象
-                args=(),
-                notify=make_ScriptManagerMsgBus_update_callback(self.index),
-            )
+        if subscribe_msgbus_item(item):
+            self.report({"INFO"}, f"Register Trigger monitoring: {RNA_path} - {text_name}")
             return {"FINISHED"}
         else:
             self.report({"ERROR"}, f"Invalid path or the specified script is empty: {RNA_path}")
@@ -1043,16 +2786,15 @@ class ScriptManagerMsgBus_OT_unregister_msgbus(bpy.types.Operator):
     bl_idname = "script_manager.msgbus_unregister_msgbus"
     bl_label = "Unregister MsgBus Handlers"
 
-    RNA_path: StringProperty(name="RNA Path")
+    uid: StringProperty(name="UID")
 
     def execute(self, context):
-        if self.RNA_path != "":
-            # print(f"注销MsgBus监控: {self.RNA_path}")
-            bpy.msgbus.clear_by_owner(sys.intern(str(self.RNA_path).strip()))
-            self.report({"INFO"}, f"Unregister Trigger monitoring: {self.RNA_path}")
+        if self.uid in _msgbus_owners:
+            unsubscribe_msgbus_item(self.uid)
+            cancel_script_jobs(("MSGBUS", self.uid))
+            self.report({"INFO"}, f"Unregister Trigger monitoring: {self.uid}")
         else:
-            pass
-            self.report({"ERROR"}, f"Invalid path: {self.RNA_path}")
+            self.report({"ERROR"}, f"Trigger not registered: {self.uid}")
         return {"FINISHED"}
 
 
@@ -1062,7 +2804,7 @@ class ScriptManagerPrefs(bpy.types.PropertyGroup):
     use_auto_reload_timer: BoolProperty(name="Use Auto Reload Timer", default=False, update=use_auto_reload_update)
     # 自动重载定时器间隔
     auto_reload_timer_interval: FloatProperty(name="Auto Reload Timer Interval (s)", default=1.0, min=1)
-    auto_reload_use_time: FloatProperty(name="Auto Reload Use Time", default=0.0)
+    use_file_watcher: BoolProperty(name="Watch Files", description="Reload scripts as soon as their files change using inotify (Linux), the timer then only refreshes the watched directories", default=False, update=use_file_watcher_update)
     frame_handler_registered: BoolProperty(name="Frame Handler Registered", default=False)
     deps_handler_registered: BoolProperty(name="Deps Handler Registered", default=False)
     text_manager_collection: CollectionProperty(type=ScriptManagerItem)
@@ -1070,17 +2812,33 @@ class ScriptManagerPrefs(bpy.types.PropertyGroup):
     preview_properties: bpy.props.CollectionProperty(type=ScriptManagerPreviewPropertyItem)
     preview_properties_index: bpy.props.IntProperty(name="Index", default=0)
     preview_properties_num: bpy.props.IntProperty(name="Number", default=0)
+    preview_history_size: IntProperty(name="Preview History Size", description="Number of samples kept per watched property", default=250, min=10, max=100000)
+    preview_refresh_rate: FloatProperty(name="Preview Refresh Rate (Hz)", description="How often preview values are sampled, redraws in between show the last sample", default=10.0, min=0.1, max=240.0)
     display_handler_list: BoolProperty(name="Display Handler List", default=False)
+    display_timing_stats: BoolProperty(name="Display Timing Statistics", default=False)
+    display_timing_histogram: BoolProperty(name="Display Timing Histogram", default=False)
+    use_tracing: BoolProperty(name="Record Timeline", description="Record every dispatch for export to Chrome Trace Event JSON", default=False, update=use_tracing_update)
+    trace_buffer_size: IntProperty(name="Trace Buffer Size", description="Maximum number of recorded events, older events are dropped", default=100000, min=100)
+    process_pool_workers: IntProperty(name="Worker Processes", default=2, min=1, max=64)
+    offload_wait_timeout: FloatProperty(name="Wait Timeout (ms)", description="Longest time a process pool script with the Wait policy blocks for its result, about one frame by default", default=16.0, min=1.0)
+    thread_pool_workers: IntProperty(name="Worker Threads", default=4, min=1, max=64)
+    async_time_slice: FloatProperty(name="Async Time Slice (ms)", description="Maximum time the asyncio event loop runs per timer tick", default=4.0, min=0.1)
+    main_thread_budget: FloatProperty(name="Main Thread Budget (ms)", description="Maximum time spent applying finished background jobs per timer tick", default=5.0, min=0.1)
+    profile_runs: IntProperty(name="Profile Runs", description="Number of triggered runs to profile", default=20, min=1)
     handler_index: IntProperty(name="Handler Index", default=0, min=0)
     target_handler_name: StringProperty(name="Target Handler Name", default="")
     debug_mode: BoolProperty(name="Debug Mode", default=False)
     msgbus_collection: CollectionProperty(type=ScriptManagerMsgBusItem)
     msgbus_index: IntProperty(name="MsgBus Index", default=0)
     auto_reload_in_file_open: BoolProperty(name="Auto Reload In File Open", default=True)
+    suppress_self_updates: BoolProperty(name="Suppress Self-Triggered Updates", description="Skip the update that follows a script's own run in the next event loop passes", default=True)
+    budget_window: IntProperty(name="Budget Window", description="Number of recent runs averaged by the time budget watchdog", default=10, min=1, max=1000)
+    feedback_loop_count: IntProperty(name="Feedback Loop Limit", description="Suspend a script after it triggered itself this many times in a row", default=20, min=2)
 
 
 classes = (
     ScriptManagerAddonPreferences,
+    SCRIPTMANAGER_OT_regenerate_push_token,
     ScriptManagerPreviewPropertyItem,
     ScriptManagerItem,
     ScriptManagerMsgBusItem,
@@ -1100,6 +2858,17 @@ classes = (
     SCRIPTMANAGER_OT_move_item_down,
     SCRIPTMANAGER_OT_new_text,
     SCRIPTMANAGER_OT_run_text,
+    SCRIPTMANAGER_OT_resume_item,
+    SCRIPTMANAGER_OT_export_preview_history,
+    SCRIPTMANAGER_OT_cancel_jobs,
+    SCRIPTMANAGER_OT_reset_timing_stats,
+    SCRIPTMANAGER_OT_profile_runs,
+    SCRIPTMANAGER_OT_dump_profile,
+    SCRIPTMANAGER_OT_line_profile_runs,
+    SCRIPTMANAGER_OT_jump_to_line,
+    SCRIPTMANAGER_OT_export_trace,
+    SCRIPTMANAGER_OT_clear_trace,
+    SCRIPTMANAGER_OT_clear_code_cache,
     SCRIPTMANAGER_OT_open_in_vscode,
     SCRIPT_MANAGER_OT_add_preview_property,
     SCRIPT_MANAGER_OT_remove_preview_property,
@@ -1146,67 +2915,42 @@ def restore_handlers():
         return False
 
     handlers_restored = False
-    frame_handlers_num = 0
-    deps_handlers_num = 0
     msgbus_num = 0
-    # 恢复帧更新handlers
-    for item in prefs.text_manager_collection:
-        if item.text_pointer and item.run_in_frame_update:
-            has_handler = False
-            # 检查是否已经存在对应的handler
-            for handler in bpy.app.handlers.frame_change_pre:
-                if hasattr(handler, "_ScriptManagerItem_FC_ID") and handler._ScriptManagerItem_FC_ID == item.text_pointer.name:
-                    has_handler = True
-                    break
-
-            # 如果不存在，则添加
-            if not has_handler:
-                handler_func = make_ScriptManager_frame_update_handler(item.text_pointer.name)
-                bpy.app.handlers.frame_change_pre.append(handler_func)
-                print(f"ScriptManager: Restore frame update: {item.text_pointer.name}")
-                handlers_restored = True
-                frame_handlers_num += 1
-
-    # 恢复依赖图更新handlers
-    for item in prefs.text_manager_collection:
-        if item.text_pointer and item.run_in_desgaph_update:
-            has_handler = False
-            # 检查是否已经存在对应的handler
-            for handler in bpy.app.handlers.depsgraph_update_post:
-                if hasattr(handler, "_ScriptManagerItem_DC_ID") and handler._ScriptManagerItem_DC_ID == item.text_pointer.name:
-                    has_handler = True
-                    break
-
-            # 如果不存在，则添加
-            if not has_handler:
-                handler_func = make_ScriptManager_depsgraph_update_handler(item.text_pointer.name)
-                bpy.app.handlers.depsgraph_update_post.append(handler_func)
-                print(f"ScriptManager: Restore depsgraph update handler: {item.text_pointer.name}")
-                handlers_restored = True
-                deps_handlers_num += 1
-    # 恢复msgbus
-    for i, item in enumerate(prefs.msgbus_collection):
-        if item.RNA_path != "" and item.text_pointer and item.is_registered:
-            RNA_path = prefs.msgbus_collection[i].RNA_path
-            text_name = prefs.msgbus_collection[i].text_pointer.name if prefs.msgbus_collection[i].text_pointer else ""
-            if RNA_path == "" or text_name == "":
-                DebugPrint(f"ScriptManager: Path or script cannot be empty: {RNA_path} - {text_name}")
-                continue
-            valid_path, key = get_msgbus_key(RNA_path)
-            if RNA_path and valid_path and text_name != "":
-                DebugPrint(f"ScriptManager: Register Trigger monitoring: {RNA_path} - {text_name}-key: {key}")
-
-                bpy.msgbus.subscribe_rna(
-                    key=key,
-                    owner=sys.intern(str(RNA_path).strip()),  # 保证注册时和注销时是完全一致的对象
-                    args=(),
-                    notify=make_ScriptManagerMsgBus_update_callback(i),
-                )
+    # 时间线记录器只存在于内存中, 按保存的开关重新创建
+    use_tracing_update(prefs, bpy.context)
+    # 缓冲池以数据块地址为键, 打开文件后全部失效
+    bulk.clear_pool()
+    # 相对路径以 blend 文件为基准, 打开文件后重新解析
+    _abspath_cache.clear()
+    _file_stats.forget()
+    update_file_watcher(prefs)
+    if _file_watcher.running:
+        sync_file_watches(prefs)
+    # 监视模式的回调和历史记录不保存在文件中
+    _preview_history.clear()
+    invalidate_preview_cache()
+    if sync_preview_watch_handler(bpy.context.scene):
+        handlers_restored = True
+    # 恢复帧更新和依赖图更新的调度器
+    frame_handlers_num, deps_handlers_num = sync_dispatch_handlers(bpy.context.scene)
+    if frame_handlers_num or deps_handlers_num:
+        print(f"ScriptManager: Restore dispatch handlers: {frame_handlers_num} frame update, {deps_handlers_num} depsgraph update")
+        handlers_restored = True
+    # 恢复msgbus: 旧文件中的条目没有 uid, 复制出的条目 uid 重复, 都重新分配
+    unsubscribe_msgbus_item()
+    _msgbus_index.clear()
+    seen_uids = set()
+    for item in prefs.msgbus_collection:
+        if not item.uid or item.uid in seen_uids:
+            item.uid = uuid.uuid4().hex
+        seen_uids.add(item.uid)
+        if msgbus_item_target(item) != "" and item.text_pointer and item.is_registered:
+            if subscribe_msgbus_item(item):
+                DebugPrint(f"ScriptManager: Register Trigger monitoring: {msgbus_item_target(item)} - {item.text_pointer.name}")
                 handlers_restored = True
                 msgbus_num += 1
             else:
-                DebugPrint(f"ScriptManager: Invalid path or the specified script is empty: {RNA_path}")
-                continue
+                DebugPrint(f"ScriptManager: Invalid path or the specified script is empty: {msgbus_item_target(item)}")
 
     if handlers_restored:
         print(f"ScriptManager: Restore complete, restored {frame_handlers_num} frame update, {deps_handlers_num} depsgraph update, {msgbus_num} Trigger monitors")
@@ -1223,10 +2967,13 @@ def register():
 
     # 注册文件加载完成后的处理函数
     bpy.app.handlers.load_post.append(ScriptManager_load_post_handler)
+    bpy.app.handlers.undo_post.append(ScriptManager_undo_post_handler)
+    bpy.app.handlers.redo_post.append(ScriptManager_undo_post_handler)
     load_language()
 
     # 在注册完成后恢复handlers(针对插件重新启用的情况)
     def delayed_restore():
+        update_push_server(bpy.context.preferences.addons[__name__].preferences)
         restore_handlers()
         return None
 
@@ -1237,6 +2984,31 @@ def unregister():
     # 移除文件加载完成后的处理函数
     if ScriptManager_load_post_handler in bpy.app.handlers.load_post:
         bpy.app.handlers.load_post.remove(ScriptManager_load_post_handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if ScriptManager_undo_post_handler in handlers:
+            handlers.remove(ScriptManager_undo_post_handler)
+    for handlers in (bpy.app.handlers.frame_change_pre, bpy.app.handlers.frame_change_post, bpy.app.handlers.depsgraph_update_post):
+        for handler in list(handlers):
+            if is_script_manager_handler(handler):
+                handlers.remove(handler)
+
+    if bpy.app.timers.is_registered(main_thread_queue_timer):
+        bpy.app.timers.unregister(main_thread_queue_timer)
+    _process_pool.shutdown()
+    cancel_script_jobs()
+    _thread_pool.shutdown()
+    unsubscribe_msgbus_item()
+    _file_watcher.stop()
+    if bpy.app.timers.is_registered(file_watch_timer):
+        bpy.app.timers.unregister(file_watch_timer)
+    _push_server.stop()
+    if bpy.app.timers.is_registered(push_server_timer):
+        bpy.app.timers.unregister(push_server_timer)
+    if bpy.app.timers.is_registered(async_loop_timer):
+        bpy.app.timers.unregister(async_loop_timer)
+    if bpy.app.timers.is_registered(own_update_timer):
+        bpy.app.timers.unregister(own_update_timer)
+    _async_loop.close()
 
     del bpy.types.Scene.text_manager_prefs
 
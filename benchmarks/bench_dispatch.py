@@ -0,0 +1,248 @@
+"""Script Manager 自身调度开销的基准测试, 使用空脚本排除用户代码的耗时.
+
+用法:
+    blender -b --factory-startup --python benchmarks/bench_dispatch.py -- --output result.json
+    blender -b --factory-startup --python benchmarks/bench_dispatch.py -- --baseline result.json --tolerance 0.2
+
+也可以在安装了 bpy 模块的 Python 中直接运行. 指定 --baseline 时与基线的中位数比较,
+任一项变慢超过 tolerance 时以退出码 1 结束.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import bpy
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ITEM_COUNTS = (1, 10, 100, 1000)
+
+
+def load_addon():
+    """以 script_manager 包名加载仓库中的插件并注册"""
+    spec = importlib.util.spec_from_file_location("script_manager", os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["script_manager"] = module
+    spec.loader.exec_module(module)
+    module.register()
+    return module
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Benchmark Script Manager dispatch and reload paths")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per case")
+    parser.add_argument("--counts", type=int, nargs="+", default=list(ITEM_COUNTS), help="Managed item counts")
+    return parser.parse_args(argv)
+
+
+def measure(func, repeat, warmup=5, setup=None):
+    """setup 在每次调用前执行, 不计入耗时"""
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func()
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return {
+        "median_us": statistics.median(samples),
+        "mean_us": statistics.fmean(samples),
+        "min_us": min(samples),
+        "max_us": max(samples),
+        "repeat": repeat,
+    }
+
+
+def clear_scene(addon, scene):
+    prefs = scene.text_manager_prefs
+    with contextlib.redirect_stdout(io.StringIO()):
+        prefs.use_auto_reload_timer = False
+        prefs.text_manager_collection.clear()
+        prefs.msgbus_collection.clear()
+        addon.sync_dispatch_handlers(scene)
+    for text in list(bpy.data.texts):
+        if text.name.startswith("bench_"):
+            bpy.data.texts.remove(text)
+    addon.invalidate_code_cache()
+    addon._item_runtime.clear()
+
+
+def end_event_loop_pass(addon):
+    """后台模式下定时器不运行, 手动执行自身更新标记的定时器, 模拟两次更新之间经过的事件循环"""
+    while addon.own_update_timer() is not None:
+        pass
+
+
+def add_items(addon, scene, count, source="pass\n", **flags):
+    """添加 count 个使用空脚本的条目, flags 为条目上要打开的开关"""
+    prefs = scene.text_manager_prefs
+    texts = []
+    # 开关的 update 回调会打印日志, 这里屏蔽掉
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            text = bpy.data.texts.new(f"bench_{i:04d}.py")
+            text.write(source)
+            item = prefs.text_manager_collection.add()
+            item.text_pointer = text
+            for name, value in flags.items():
+                setattr(item, name, value)
+            texts.append(text)
+    return texts
+
+
+def bench_frame_dispatch(addon, scene, counts, repeat):
+    results = {}
+    for count in counts:
+        clear_scene(addon, scene)
+        add_items(addon, scene, count, run_in_frame_update=True)
+        result = measure(lambda: addon.ScriptManager_frame_update_handler(scene), repeat)
+        result["per_item_us"] = result["median_us"] / count
+        results[f"frame_dispatch/{count}"] = result
+    return results
+
+
+def bench_depsgraph_dispatch(addon, scene, counts, repeat):
+    results = {}
+    for count in counts:
+        clear_scene(addon, scene)
+        add_items(addon, scene, count, run_in_desgaph_update=True)
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        result = measure(lambda: addon.ScriptManager_depsgraph_update_handler(scene, depsgraph), repeat, setup=lambda: end_event_loop_pass(addon))
+        result["per_item_us"] = result["median_us"] / count
+        results[f"depsgraph_dispatch/{count}"] = result
+    return results
+
+
+def bench_msgbus_callbacks(addon, scene, counts, repeat):
+    results = {}
+    for count in counts:
+        clear_scene(addon, scene)
+        prefs = scene.text_manager_prefs
+        callbacks = []
+        for text in add_items(addon, scene, count):
+            item = prefs.msgbus_collection.add()
+            item.RNA_path = f'bpy.data.scenes["{scene.name}"].frame_current'
+            item.text_pointer = text
+            callbacks.append(addon.make_ScriptManagerMsgBus_update_callback(addon.ensure_msgbus_uid(item)))
+
+        def notify_all():
+            for callback in callbacks:
+                callback()
+
+        result = measure(notify_all, repeat, setup=lambda: end_event_loop_pass(addon))
+        result["per_item_us"] = result["median_us"] / count
+        results[f"msgbus_callback/{count}"] = result
+    return results
+
+
+def bench_auto_reload(addon, scene, counts, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            clear_scene(addon, scene)
+            texts = add_items(addon, scene, count, auto_reload=True)
+            for text in texts:
+                filepath = os.path.join(directory, text.name)
+                with open(filepath, "w", encoding="utf-8") as f:
+                    f.write("pass\n")
+                text.filepath = filepath
+            result = measure(addon.auto_reload_timer_callback, repeat)
+            result["per_item_us"] = result["median_us"] / count
+            results[f"auto_reload_timer/{count}"] = result
+    return results
+
+
+def bench_restore_handlers(addon, scene, counts, repeat):
+    results = {}
+    for count in counts:
+        clear_scene(addon, scene)
+        add_items(addon, scene, count, run_in_frame_update=True, run_in_desgaph_update=True)
+
+        def restore():
+            # 模拟加载文件: Blender 会先移除非 persistent 的 handler
+            for handlers in (bpy.app.handlers.frame_change_pre, bpy.app.handlers.depsgraph_update_post):
+                for handler in list(handlers):
+                    if addon.is_script_manager_handler(handler):
+                        handlers.remove(handler)
+            with contextlib.redirect_stdout(io.StringIO()):
+                addon.restore_handlers()
+
+        result = measure(restore, max(1, repeat // 10), warmup=1)
+        result["per_item_us"] = result["median_us"] / count
+        results[f"restore_handlers/{count}"] = result
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """打印与基线的对比, 返回变慢超过 tolerance 的项目"""
+    regressions = []
+    print(f"{'case':32s} {'baseline':>12s} {'current':>12s} {'ratio':>8s}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:32s} {'-':>12s} {result['median_us']:10.1f}us {'new':>8s}")
+            continue
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:32s} {base['median_us']:10.1f}us {result['median_us']:10.1f}us {ratio:8.2f}{flag}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    addon = load_addon()
+    scene = bpy.context.scene
+    results = {}
+    try:
+        for bench in (bench_frame_dispatch, bench_depsgraph_dispatch, bench_msgbus_callbacks, bench_auto_reload, bench_restore_handlers):
+            results.update(bench(addon, scene, args.counts, args.repeat))
+    finally:
+        clear_scene(addon, scene)
+        addon.unregister()
+
+    report = {
+        "meta": {
+            "blender": bpy.app.version_string,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""脚本中通过 bulk 使用的批量读写函数, 用 foreach_get/foreach_set 代替逐个元素访问.
+
+读取函数默认每次返回新的数组. 每帧都读取的脚本可以传 pooled=True 复用缓冲池中的数组,
+避免重复分配内存, 但同一个数据块/属性/长度的下一次 pooled 读取会覆盖上一次返回的数组,
+需要同时保留两次结果时不要使用 pooled, 或者 copy(). 也可以用 out= 传入自己的数组.
+矩阵按 numpy 的行主序返回, 即 m[i][row][col]."""
+
+import collections
+
+import numpy as np
+
+POOL_SIZE = 128
+
+# 网格属性类型 -> (foreach 属性名, 每个元素的分量数, dtype)
+ATTRIBUTE_LAYOUTS = {
+    "FLOAT": ("value", 1, np.float32),
+    "INT": ("value", 1, np.int32),
+    "BOOLEAN": ("value", 1, np.bool_),
+    "FLOAT2": ("vector", 2, np.float32),
+    "FLOAT_VECTOR": ("vector", 3, np.float32),
+    "QUATERNION": ("value", 4, np.float32),
+    "FLOAT_COLOR": ("color", 4, np.float32),
+    "BYTE_COLOR": ("color", 4, np.float32),
+}
+
+
+class BufferPool:
+    """按 (数据块, 属性, 长度) 复用数组, 超过 size 个时丢弃最久未使用的"""
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self.buffers = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, shape, dtype):
+        key = (key, shape, np.dtype(dtype).str)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            self.misses += 1
+            buffer = self.buffers[key] = np.empty(shape, dtype=dtype)
+            if len(self.buffers) > self.size:
+                self.buffers.popitem(last=False)
+        else:
+            self.hits += 1
+            self.buffers.move_to_end(key)
+        return buffer
+
+    def clear(self):
+        self.buffers.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+pool = BufferPool()
+
+
+def clear_pool():
+    """加载文件后数据块的地址会失效, 需要清空缓冲池"""
+    pool.clear()
+
+
+def pool_key(collection, attribute, layer, count):
+    # 不是所有集合都有 rna_type (例如属性层的 data), 只用所属数据块区分;
+    # 同一网格的不同属性层类型和属性名相同, 需要用层名区分.
+    # bpy.data 下的集合没有所属数据块, 属性和长度相同时共用缓冲区
+    owner = collection.id_data
+    return (owner.as_pointer() if owner is not None else 0, attribute, layer, count)
+
+
+def read(collection, attribute, width=1, dtype=np.float32, layer="", pooled=False, out=None):
+    """读取集合中每个元素的属性, 返回形状为 (n,) 或 (n, width) 的数组.
+    pooled=True 时返回缓冲池中的数组, 会被下一次相同的 pooled 读取覆盖; out 为用于写入的数组"""
+    count = len(collection)
+    shape = (count,) if width == 1 else (count, width)
+    if out is not None:
+        buffer = out
+    elif pooled:
+        buffer = pool.get(pool_key(collection, attribute, layer, count), shape, dtype)
+    else:
+        buffer = np.empty(shape, dtype=dtype)
+    collection.foreach_get(attribute, buffer.ravel())
+    return buffer
+
+
+def write(collection, attribute, values, dtype=np.float32):
+    """把数组写入集合中每个元素的属性, values 的元素总数需与集合匹配"""
+    values = np.ascontiguousarray(values, dtype=dtype)
+    collection.foreach_set(attribute, values.ravel())
+
+
+def vertex_coords(mesh, pooled=False):
+    return read(mesh.vertices, "co", 3, pooled=pooled)
+
+
+def set_vertex_coords(mesh, coords):
+    write(mesh.vertices, "co", coords)
+    mesh.update()
+
+
+def vertex_normals(mesh, pooled=False):
+    # Blender 4.1 起法线只能从 vertex_normals 读取
+    if hasattr(mesh, "vertex_normals"):
+        return read(mesh.vertex_normals, "vector", 3, pooled=pooled)
+    return read(mesh.vertices, "normal", 3, pooled=pooled)
+
+
+def attribute_layout(mesh, name):
+    layer = mesh.attributes.get(name)
+    if layer is None:
+        raise KeyError(f"Attribute '{name}' not found in mesh '{mesh.name}'")
+    layout = ATTRIBUTE_LAYOUTS.get(layer.data_type)
+    if layout is None:
+        raise ValueError(f"Attribute type '{layer.data_type}' is not supported")
+    return layer, layout
+
+
+def attribute(mesh, name, pooled=False):
+    """读取网格的自定义属性, 形状取决于属性类型"""
+    layer, (prop, width, dtype) = attribute_layout(mesh, name)
+    return read(layer.data, prop, width, dtype, layer.name, pooled=pooled)
+
+
+def set_attribute(mesh, name, values):
+    layer, (prop, width, dtype) = attribute_layout(mesh, name)
+    write(layer.data, prop, values, dtype)
+    mesh.update()
+
+
+def locations(objects, pooled=False):
+    return read(objects, "location", 3, pooled=pooled)
+
+
+def set_locations(objects, values):
+    write(objects, "location", values)
+
+
+def rotations(objects, pooled=False):
+    """欧拉角旋转, 弧度"""
+    return read(objects, "rotation_euler", 3, pooled=pooled)
+
+
+def set_rotations(objects, values):
+    write(objects, "rotation_euler", values)
+
+
+def scales(objects, pooled=False):
+    return read(objects, "scale", 3, pooled=pooled)
+
+
+def set_scales(objects, values):
+    write(objects, "scale", values)
+
+
+def matrices(objects, attribute="matrix_world", pooled=False):
+    """返回形状为 (n, 4, 4) 的矩阵数组"""
+    buffer = read(objects, attribute, 16, pooled=pooled)
+    # foreach_get 按列主序展开矩阵, 转置为行主序后写回缓冲区
+    buffer[:] = buffer.reshape(-1, 4, 4).transpose(0, 2, 1).reshape(-1, 16)
+    return buffer.reshape(-1, 4, 4)
+
+
+def set_matrices(objects, values, attribute="matrix_world"):
+    values = np.asarray(values, dtype=np.float32).reshape(-1, 4, 4)
+    write(objects, attribute, values.transpose(0, 2, 1))
+
+
+# RNA 属性类型 -> 快照使用的 dtype, 其他类型(字符串、枚举、指针)逐个读取
+PROPERTY_DTYPES = {
+    "FLOAT": np.float32,
+    "INT": np.int32,
+    "BOOLEAN": np.bool_,
+}
+
+
+def snapshot(collection, attribute, width=1, dtype=np.float32):
+    """读取属性, 用于比较两次读取之间的变化. 不使用缓冲池, 不会被之后的读取覆盖"""
+    return read(collection, attribute, width, dtype)
+
+
+def changed_rows(previous, current):
+    """返回两次快照中值不同的行号, 形状不同时认为全部变化"""
+    if previous.shape != current.shape:
+        return np.arange(len(current))
+    diff = previous != current
+    if diff.ndim > 1:
+        diff = diff.any(axis=1)
+    return np.flatnonzero(diff)
@@ -0,0 +1,261 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+from .stats import RingBuffer
+
+WORKER_DIR = os.path.join(os.path.dirname(__file__), "workers")
+
+
+class MainThreadQueue:
+    """后台任务完成后把回调放入队列, 由主线程的定时器取出执行"""
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.in_flight = 0  # 已提交但回调尚未执行的任务数
+        self.lock = threading.Lock()
+
+    def begin(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def put(self, callback):
+        """可以在任意线程调用, callback 会在主线程执行"""
+        self.queue.put(callback)
+
+    def end(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def drain(self, budget=None):
+        """执行队列中的回调, 返回执行的数量. budget 为本次最多占用的秒数, 超出后剩余回调留到下一次"""
+        count = 0
+        deadline = None if budget is None else time.perf_counter() + budget
+        while deadline is None or time.perf_counter() < deadline:
+            try:
+                callback = self.queue.get_nowait()
+            except queue.Empty:
+                return count
+            try:
+                callback()
+            except Exception as e:
+                print(f"ScriptManager: Main thread callback failed: {e}")
+            count += 1
+        return count
+
+    def busy(self):
+        return self.in_flight > 0 or not self.queue.empty()
+
+
+class ProcessPool:
+    """常驻的进程池, 使用 spawn 避免 fork 整个 Blender 进程"""
+
+    def __init__(self):
+        self.executor = None
+        self.workers = 0
+        self.worker_module = None
+
+    def get(self, workers):
+        if self.executor is None or self.workers != workers:
+            self.shutdown()
+            # 任务函数按模块名序列化, 工作进程需要能以顶层模块名导入它
+            if WORKER_DIR not in sys.path:
+                sys.path.append(WORKER_DIR)
+            self.worker_module = importlib.import_module("script_manager_worker")
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            self.workers = workers
+            # 预热, 让工作进程提前启动
+            for _ in range(workers):
+                self.executor.submit(self.worker_module.warm_up)
+        return self.executor
+
+    def submit_compute(self, workers, text_name, digest, source, inputs):
+        return self.get(workers).submit(self.worker_module.compute, text_name, digest, source, inputs)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+class ThreadPool:
+    """脚本共用的后台线程池"""
+
+    def __init__(self):
+        self.executor = None
+        self.workers = 0
+
+    def get(self, workers):
+        if self.executor is None or self.workers != workers:
+            self.shutdown()
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ScriptManager")
+            self.workers = workers
+        return self.executor
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+class ThreadJobs:
+    """注入脚本命名空间的 jobs 对象: 在后台线程执行耗时操作, 完成回调在主线程执行.
+
+    jobs.submit(func, *args, on_done=None, on_error=None, **kwargs) 返回 Future,
+    func 中不能访问 bpy 数据, 需要时把结果交给 on_done(result) 在主线程处理.
+    长时间运行的 func 可以检查 jobs.cancelled 提前结束.
+
+    同一个脚本可能被多个条目使用, 任务按提交时的 owner(条目键) 分组, 可以只取消某个条目的任务"""
+
+    def __init__(self, name, get_executor, main_queue, wake):
+        self.name = name
+        self.get_executor = get_executor
+        self.main_queue = main_queue
+        self.wake = wake  # 提交任务后确保主线程定时器在运行
+        self.owner = None  # 当前正在运行脚本的条目, 由调度方设置
+        self.futures = {}  # Future -> owner
+        self.events = {}  # owner -> 该条目当前批次的取消标记
+        self.local = threading.local()
+
+    def get_event(self, owner):
+        event = self.events.get(owner)
+        if event is None:
+            event = self.events[owner] = threading.Event()
+        return event
+
+    def submit(self, func, *args, on_done=None, on_error=None, **kwargs):
+        owner = self.owner
+        event = self.get_event(owner)
+        future = self.get_executor().submit(self._run, event, func, args, kwargs)
+        self.futures[future] = owner
+        self.main_queue.begin()
+        future.add_done_callback(lambda done: self.main_queue.put(functools.partial(self._finish, done, owner, event, on_done, on_error)))
+        self.wake()
+        return future
+
+    def _run(self, event, func, args, kwargs):
+        self.local.event = event
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.local.event = None
+
+    def _finish(self, future, owner, event, on_done, on_error):
+        self.main_queue.end()
+        self.futures.pop(future, None)
+        # 已取消的任务即使执行完也不再回调
+        if event.is_set() or future.cancelled():
+            return
+        # 回调中提交的后续任务仍属于同一个条目
+        previous, self.owner = self.owner, owner
+        try:
+            error = future.exception()
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+                else:
+                    print(f"ScriptManager: Job in '{self.name}' failed: {error}")
+            elif on_done is not None:
+                on_done(future.result())
+        finally:
+            self.owner = previous
+
+    @property
+    def cancelled(self):
+        """在任务线程中表示该任务所属的批次是否已被取消"""
+        event = getattr(self.local, "event", None) or self.get_event(self.owner)
+        return event.is_set()
+
+    @property
+    def pending(self):
+        return len(self.futures)
+
+    def count(self, owner):
+        return sum(1 for future_owner in self.futures.values() if future_owner == owner)
+
+    def cancel(self, owner=None):
+        """取消指定条目(不指定时为全部)尚未开始的任务, 已在运行的任务结束后丢弃结果, 之后提交的任务不受影响"""
+        for event_owner in list(self.events):
+            if owner is None or event_owner == owner:
+                self.events.pop(event_owner).set()
+        for future, future_owner in list(self.futures.items()):
+            if owner is None or future_owner == owner:
+                future.cancel()
+
+
+class AsyncLoop:
+    """由主线程定时器驱动的 asyncio 事件循环, 每次只运行有限的时间片.
+    协程在主线程执行, 可以直接访问 bpy 数据"""
+
+    def __init__(self):
+        self.loop = None
+        self.tasks = {}  # 所属条目 -> {Task}
+        self.tick_times = RingBuffer(64)  # 每次步进的毫秒数
+
+    def get_loop(self):
+        if self.loop is None or self.loop.is_closed():
+            self.loop = asyncio.new_event_loop()
+        return self.loop
+
+    def schedule(self, name, coroutine):
+        task = self.get_loop().create_task(coroutine)
+        self.tasks.setdefault(name, set()).add(task)
+        task.add_done_callback(functools.partial(self._task_done, name))
+        return task
+
+    def start(self, name, coroutine):
+        """调度协程并立即运行到第一个 await, 协程开头读取的是触发时的数据"""
+        task = self.schedule(name, coroutine)
+        if not self.loop.is_running():
+            self.step(0)
+        return task
+
+    def _task_done(self, name, task):
+        tasks = self.tasks.get(name)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self.tasks[name]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"ScriptManager: Async task of {name} failed: {task.exception()}")
+
+    def step(self, time_slice):
+        """运行事件循环直到没有就绪的回调或用完时间片(秒), 返回是否还有未完成的任务"""
+        loop = self.get_loop()
+        start = time.perf_counter()
+        while True:
+            # stop 排在已就绪的回调之后, run_forever 只运行一轮
+            loop.call_soon(loop.stop)
+            loop.run_forever()
+            # _ready 为空表示剩下的任务都在等待定时器或 I/O
+            if not getattr(loop, "_ready", None) or time.perf_counter() - start >= time_slice:
+                break
+        self.tick_times.append((time.perf_counter() - start) * 1000)
+        return bool(self.tasks)
+
+    def count(self, name=None):
+        if name is None:
+            return sum(len(tasks) for tasks in self.tasks.values())
+        return len(self.tasks.get(name, ()))
+
+    def cancel(self, name=None):
+        for task_name, tasks in list(self.tasks.items()):
+            if name is None or task_name == name:
+                for task in list(tasks):
+                    task.cancel()
+
+    def close(self):
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.cancel()
+        # 让被取消的任务处理 CancelledError
+        self.step(0.1)
+        self.loop.close()
+        self.tasks.clear()
@@ -0,0 +1,163 @@
+import cProfile
+import collections
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+
+
+class ProfileCapture:
+    """累计若干次运行的 cProfile 结果"""
+
+    def __init__(self, runs):
+        self.total_runs = runs
+        self.remaining = runs
+        self.stats = None
+
+    def run(self, func, *args):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args)
+        finally:
+            profiler.disable()
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+            self.remaining -= 1
+
+    def top_functions(self, limit=10):
+        """按累计耗时排序, 返回 [(累计毫秒, 自身毫秒, 调用次数, 函数描述)]"""
+        if self.stats is None:
+            return []
+        rows = []
+        for (filename, line, name), (cc, nc, tt, ct, callers) in self.stats.stats.items():
+            rows.append((ct * 1000, tt * 1000, nc, f"{name} ({filename}:{line})" if line else name))
+        rows.sort(key=lambda row: row[0], reverse=True)
+        return rows[:limit]
+
+    def dump(self, filepath):
+        self.stats.dump_stats(filepath)
+
+
+def iter_code_objects(code):
+    """递归返回 code 及其嵌套定义的函数/类的 code object"""
+    yield code
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            yield from iter_code_objects(const)
+
+
+class LineProfileCapture:
+    """累计若干次运行中脚本每一行的耗时和执行次数.
+    Python 3.12+ 使用 sys.monitoring 只监听脚本自身的 code object, 否则退回 sys.settrace"""
+
+    def __init__(self, runs, filename):
+        self.total_runs = runs
+        self.remaining = runs
+        self.filename = filename
+        self.times = {}  # 行号 -> 累计秒数
+        self.hits = {}  # 行号 -> 执行次数
+        self._last_line = None
+        self._last_time = 0.0
+
+    def _line_event(self, line):
+        now = time.perf_counter()
+        # 上一行的耗时持续到下一行开始, 包括其中调用的 bpy 等非脚本代码
+        if self._last_line is not None:
+            self.times[self._last_line] = self.times.get(self._last_line, 0.0) + now - self._last_time
+        self.hits[line] = self.hits.get(line, 0) + 1
+        self._last_line = line
+        self._last_time = time.perf_counter()
+
+    def _finish(self):
+        self._line_event(None)
+        self.hits.pop(None, None)
+        self._last_line = None
+
+    def run(self, code, func, *args):
+        try:
+            if hasattr(sys, "monitoring"):
+                return self._run_monitoring(code, func, *args)
+            return self._run_settrace(func, *args)
+        finally:
+            self._finish()
+            self.remaining -= 1
+
+    def _run_monitoring(self, code, func, *args):
+        monitoring = sys.monitoring
+        tool_id = next((i for i in range(6) if monitoring.get_tool(i) is None), None)
+        if tool_id is None:
+            return self._run_settrace(func, *args)
+        code_objects = list(iter_code_objects(code))
+        monitoring.use_tool_id(tool_id, "script_manager_line_profiler")
+        monitoring.register_callback(tool_id, monitoring.events.LINE, lambda code, line: self._line_event(line))
+        for code_object in code_objects:
+            monitoring.set_local_events(tool_id, code_object, monitoring.events.LINE)
+        try:
+            return func(*args)
+        finally:
+            for code_object in code_objects:
+                monitoring.set_local_events(tool_id, code_object, 0)
+            monitoring.register_callback(tool_id, monitoring.events.LINE, None)
+            monitoring.free_tool_id(tool_id)
+
+    def _run_settrace(self, func, *args):
+        filename = self.filename
+
+        def local_trace(frame, event, arg):
+            if event == "line":
+                self._line_event(frame.f_lineno)
+            return local_trace
+
+        def global_trace(frame, event, arg):
+            # 只跟踪脚本自身的帧
+            return local_trace if frame.f_code.co_filename == filename else None
+
+        previous = sys.gettrace()
+        sys.settrace(global_trace)
+        try:
+            return func(*args)
+        finally:
+            sys.settrace(previous)
+
+    def hot_lines(self, limit=10):
+        """按耗时排序, 返回 [(行号, 累计毫秒, 执行次数)]"""
+        rows = [(line, seconds * 1000, self.hits.get(line, 0)) for line, seconds in self.times.items() if line is not None]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows[:limit]
+
+
+class TraceRecorder:
+    """记录调度事件的有界缓冲区, 可导出为 Chrome Trace Event JSON (Perfetto / chrome://tracing)"""
+
+    def __init__(self, max_events=100000):
+        self.events = collections.deque(maxlen=max_events)
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+
+    def record(self, name, category, start, end, args=None):
+        """start/end 为 time.perf_counter() 的秒数"""
+        self.events.append((name, category, start, end, args))
+
+    def clear(self):
+        self.events.clear()
+
+    def to_json(self):
+        trace_events = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": self.tid, "args": {"name": "Blender"}},
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": self.tid, "args": {"name": "Script Manager"}},
+        ]
+        for name, category, start, end, args in self.events:
+            event = {"name": name, "cat": category, "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6, "pid": self.pid, "tid": self.tid}
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export(self, filepath):
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f)
@@ -0,0 +1,130 @@
+import json
+import selectors
+import socket
+
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+class PushServer:
+    """只监听本机的 TCP 服务, 由主线程定时器调用 poll() 处理消息, 不使用后台线程.
+
+    每条消息是一行 JSON, 每条消息回复一行 JSON, 例如:
+        {"token": "...", "command": "replace", "text": "script.py", "content": "...", "run": true}
+    """
+
+    def __init__(self):
+        self.selector = None
+        self.listener = None
+        self.buffers = {}  # 连接 -> 未读完的数据
+        self.outgoing = {}  # 连接 -> 未发送完的回复
+
+    @property
+    def running(self):
+        return self.listener is not None
+
+    @property
+    def address(self):
+        return self.listener.getsockname() if self.listener is not None else None
+
+    def start(self, port, host="127.0.0.1"):
+        listener = socket.create_server((host, port))
+        listener.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(listener, selectors.EVENT_READ)
+        self.listener = listener
+
+    def stop(self):
+        if self.listener is None:
+            return
+        for connection in list(self.buffers):
+            self._close(connection)
+        self.selector.unregister(self.listener)
+        self.listener.close()
+        self.selector.close()
+        self.listener = None
+        self.selector = None
+
+    def _close(self, connection):
+        self.buffers.pop(connection, None)
+        self.outgoing.pop(connection, None)
+        self.selector.unregister(connection)
+        connection.close()
+
+    def _send(self, connection, data):
+        """连接保持非阻塞, 发送不完的数据留到可写时再发送, 不会因为客户端读取慢而阻塞主线程"""
+        pending = self.outgoing[connection]
+        pending += data
+        if len(pending) > MAX_MESSAGE_SIZE:
+            self._close(connection)
+            return False
+        return self._flush(connection)
+
+    def _flush(self, connection):
+        pending = self.outgoing[connection]
+        try:
+            sent = connection.send(pending)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._close(connection)
+            return False
+        del pending[:sent]
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE if pending else selectors.EVENT_READ
+        self.selector.modify(connection, events)
+        return True
+
+    def poll(self, handler):
+        """处理已就绪的连接和消息, handler(message) 返回回复的字典. 返回处理的消息数.
+        不是 JSON 对象的行(例如浏览器发来的 HTTP 请求头)会直接关闭连接"""
+        handled = 0
+        for key, events in self.selector.select(timeout=0):
+            sock = key.fileobj
+            if sock is self.listener:
+                try:
+                    connection, _ = sock.accept()
+                except BlockingIOError:
+                    continue
+                connection.setblocking(False)
+                self.selector.register(connection, selectors.EVENT_READ)
+                self.buffers[connection] = b""
+                self.outgoing[connection] = bytearray()
+                continue
+            if sock not in self.buffers:
+                continue
+            if events & selectors.EVENT_WRITE and not self._flush(sock):
+                continue
+            if not events & selectors.EVENT_READ:
+                continue
+            try:
+                data = sock.recv(64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                data = b""
+            if not data:
+                self._close(sock)
+                continue
+            buffer = self.buffers[sock] + data
+            *lines, rest = buffer.split(b"\n")
+            if len(rest) > MAX_MESSAGE_SIZE:
+                self._close(sock)
+                continue
+            self.buffers[sock] = rest
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    self._close(sock)
+                    break
+                try:
+                    reply = handler(message)
+                except Exception as e:
+                    reply = {"ok": False, "message": str(e)}
+                handled += 1
+                if not self._send(sock, json.dumps(reply).encode("utf-8") + b"\n"):
+                    break
+        return handled
@@ -0,0 +1,97 @@
+from array import array
+import math
+
+
+class RingBuffer:
+    """定长的 double 环形缓冲区, 写满后覆盖最旧的数据"""
+
+    __slots__ = ("data", "size", "index", "count")
+
+    def __init__(self, size=256):
+        self.data = array("d", bytes(8 * size))
+        self.size = size
+        self.index = 0  # 下一个写入位置
+        self.count = 0  # 累计写入次数
+
+    def append(self, value):
+        self.data[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def values(self):
+        """按时间顺序返回缓冲区中的数据"""
+        if self.count < self.size:
+            return self.data[: self.count].tolist()
+        return self.data[self.index :].tolist() + self.data[: self.index].tolist()
+
+    def last(self):
+        if self.count == 0:
+            return None
+        return self.data[self.index - 1]
+
+
+def percentile(sorted_values, q):
+    """线性插值的百分位数, sorted_values 需已排序且非空"""
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(ring):
+    """返回缓冲区内数据的 min/mean/p50/p95/max, 以及累计次数; 没有数据时返回 None"""
+    values = sorted(ring.values())
+    if not values:
+        return None
+    return {
+        "min": values[0],
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "max": values[-1],
+        "count": ring.count,
+    }
+
+
+def histogram(values, bins=8, width=20):
+    """返回文本直方图, 每个区间一行"""
+    if not values:
+        return []
+    low, high = min(values), max(values)
+    span = (high - low) or 1.0
+    counts = [0] * bins
+    for value in values:
+        counts[min(int((value - low) / span * bins), bins - 1)] += 1
+    peak = max(counts)
+    lines = []
+    for i, num in enumerate(counts):
+        start = low + span * i / bins
+        bar = "█" * round(num / peak * width) if peak else ""
+        lines.append(f"{start:8.2f} | {bar} {num}")
+    return lines
+
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values, width=32):
+    """返回一行文本折线图, 数据多于 width 个时按区间取平均"""
+    if not values:
+        return ""
+    if len(values) > width:
+        step = len(values) / width
+        values = [sum(chunk) / len(chunk) for chunk in (values[int(i * step) : int((i + 1) * step)] for i in range(width)) if chunk]
+    low, high = min(values), max(values)
+    span = high - low
+    if not span:
+        return SPARK_CHARS[0] * len(values)
+    return "".join(SPARK_CHARS[min(int((value - low) / span * len(SPARK_CHARS)), len(SPARK_CHARS) - 1)] for value in values)
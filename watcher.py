@@ -0,0 +1,162 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+
+# inotify 常量, 见 <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO  # 写入完成, 或编辑器保存时重命名临时文件
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def content_digest(content):
+    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+
+class FileStatCache:
+    """记录文件的 (mtime_ns, size, 内容哈希), stat 不变时不读取文件, 内容不变时不报告变化"""
+
+    def __init__(self):
+        self.entries = {}  # 路径 -> (mtime_ns, size, digest)
+        self.reads = 0  # 实际读取文件的次数
+
+    def read_if_changed(self, filepath, modified_externally):
+        """文件内容与上次不同时返回新内容, 否则返回 None.
+        第一次检查某个文件时只把磁盘内容记为基准, 不与 Text 中未保存的修改比较,
+        只有 modified_externally() 为 True (Blender 报告文件已在外部修改) 时才返回内容"""
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        entry = self.entries.get(filepath)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return None
+        with open(filepath, "r", encoding="utf-8") as f:
+            content = f.read()
+        self.reads += 1
+        digest = content_digest(content)
+        self.entries[filepath] = (stat.st_mtime_ns, stat.st_size, digest)
+        if entry is None:
+            return content if modified_externally() else None
+        # 只更新了修改时间(例如保存了没有改动的文件)时不需要重写 Text
+        if digest == entry[2]:
+            return None
+        return content
+
+    def forget(self, filepath=None):
+        if filepath is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(filepath, None)
+
+
+def load_libc():
+    """返回支持 inotify 的 libc, 其他平台返回 None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    """Linux 下用 inotify 监听目录的后台线程, 变化的文件路径放入队列, 由主线程取出处理.
+    没有变化时线程阻塞在 select 上, 不占用 CPU"""
+
+    def __init__(self):
+        self.libc = load_libc()
+        self.fd = -1
+        self.wake_pipe = None  # 用于唤醒并结束线程
+        self.watches = {}  # 目录 -> wd
+        self.directories = {}  # wd -> 目录
+        self.changes = queue.SimpleQueue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def available(self):
+        return self.libc is not None
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.fd = fd
+        self.wake_pipe = os.pipe()
+        self.thread = threading.Thread(target=self._run, name="ScriptManager file watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        os.write(self.wake_pipe[1], b"\0")
+        self.thread.join(1.0)
+        self.thread = None
+        os.close(self.fd)
+        for pipe_fd in self.wake_pipe:
+            os.close(pipe_fd)
+        self.fd = -1
+        self.wake_pipe = None
+        with self.lock:
+            self.watches.clear()
+            self.directories.clear()
+
+    def set_directories(self, directories):
+        """只监听给定的目录, 不需要的目录移除监听"""
+        with self.lock:
+            for directory in set(self.watches) - set(directories):
+                wd = self.watches.pop(directory)
+                self.directories.pop(wd, None)
+                self.libc.inotify_rm_watch(self.fd, wd)
+            for directory in set(directories) - set(self.watches):
+                wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+                if wd < 0:
+                    print(f"ScriptManager: Cannot watch directory '{directory}': {os.strerror(ctypes.get_errno())}")
+                    continue
+                self.watches[directory] = wd
+                self.directories[wd] = directory
+
+    def _run(self):
+        while True:
+            readable, _, _ = select.select([self.fd, self.wake_pipe[0]], [], [])
+            if self.wake_pipe[0] in readable:
+                return
+            data = os.read(self.fd, 64 * 1024)
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if not name or not mask & WATCH_MASK:
+                    continue
+                with self.lock:
+                    directory = self.directories.get(wd)
+                if directory is not None:
+                    self.changes.put(os.path.join(directory, os.fsdecode(name)))
+
+    def drain(self):
+        """在主线程调用, 返回自上次以来变化的文件路径"""
+        paths = set()
+        while True:
+            try:
+                paths.add(self.changes.get_nowait())
+            except queue.Empty:
+                return paths
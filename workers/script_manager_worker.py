@@ -0,0 +1,50 @@
+"""进程池工作进程中执行的代码, 不能依赖 bpy.
+
+主进程以顶层模块名 script_manager_worker 导入本文件, 任务按模块名序列化后在工作进程中重新导入.
+脚本主体会在工作进程中再执行一次以取得 compute, 其中的 import bpy 会得到一个占位模块,
+只有真正访问 bpy 的属性时才报错, 所以 compute 之外的 bpy 代码应放在 prepare/apply 中.
+"""
+
+import os
+import sys
+import time
+import types
+
+# (text 名称, 内容哈希) -> 脚本命名空间, 工作进程常驻时复用
+_namespaces = {}
+
+
+class UnavailableModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        raise RuntimeError(f"'{self.__name__}' is not available in worker processes, access it in prepare() or apply()")
+
+
+def install_placeholders():
+    for name in ("bpy", "bmesh", "mathutils"):
+        if name not in sys.modules:
+            sys.modules[name] = UnavailableModule(name)
+
+
+def warm_up():
+    """提前启动工作进程并导入本模块"""
+    install_placeholders()
+    return os.getpid()
+
+
+def compute(text_name, digest, source, inputs):
+    """返回 (结果, compute 耗时毫秒), 耗时用于主进程的统计和时间预算"""
+    key = (text_name, digest)
+    namespace = _namespaces.get(key)
+    if namespace is None:
+        install_placeholders()
+        namespace = {"__name__": "__script_manager_worker__", "__file__": text_name}
+        exec(compile(source, text_name, "exec"), namespace)
+        # 同一脚本只保留最新版本
+        for old_key in [k for k in _namespaces if k[0] == text_name]:
+            del _namespaces[old_key]
+        _namespaces[key] = namespace
+    start = time.perf_counter()
+    result = namespace["compute"](inputs)
+    return result, (time.perf_counter() - start) * 1000